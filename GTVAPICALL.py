@@ -1,12 +1,63 @@
 
+import argparse
 import csv
+import json
 import os
+import random
 import sys
-from typing import Dict, List
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+import loading
+import metrics
+import video_store
+from durations import parse_iso8601_duration
+
+DEFAULT_API_KEY = ""
+
+# Errors worth retrying: rate limiting (429), transient server errors (5xx),
+# and 403s whose reason says we are over a per-second/per-user rate limit.
+# quotaExceeded means the daily quota is gone, so waiting won't help; it is
+# raised at once and the crawl can be resumed from its checkpoint tomorrow.
+RETRYABLE_STATUSES = (429,)
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+DAILY_QUOTA_REASON = "quotaExceeded"
+
+# Quota units per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+LIST_COST = 1
+SEARCH_COST = 100
+
+
+class QuotaBudgetExceeded(RuntimeError):
+    pass
+
+
+class QuotaBudget:
+    """Thread-safe tally of API quota units spent, with an optional limit."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def spend(self, units: int) -> None:
+        with self._lock:
+            if self.limit is not None and self.used + units > self.limit:
+                raise QuotaBudgetExceeded(
+                    f"Quota budget of {self.limit} units used up ({self.used} spent)"
+                )
+            self.used += units
+
+
+# Shared by every request this process makes, across all channels and threads
+quota = QuotaBudget()
+
 
 def get_youtube_client():
     api_key = os.getenv("YOUTUBE_API_KEY", DEFAULT_API_KEY).strip()
@@ -17,6 +68,45 @@ def get_youtube_client():
     return build("youtube", "v3", developerKey=api_key)
 
 
+def is_retryable_error(e: HttpError) -> bool:
+    status = getattr(e.resp, "status", None)
+    content = e.content
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    content = content or ""
+    if DAILY_QUOTA_REASON in content:
+        return False
+    if status in RETRYABLE_STATUSES or (status is not None and 500 <= status < 600):
+        return True
+    if status == 403:
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def execute_with_backoff(
+    request, max_retries: int = 5, base_delay: float = 1.0, cost: int = LIST_COST
+) -> Dict:
+    """Execute an API request, retrying quota and rate-limit errors.
+
+    Waits base_delay * 2**attempt seconds (plus jitter) between attempts and
+    re-raises the HttpError once max_retries is used up or the error is not
+    retryable. Every attempt is charged `cost` units against `quota`.
+    """
+    attempt = 0
+    while True:
+        quota.spend(cost)
+        metrics.api_call(cost)
+        try:
+            return request.execute()
+        except HttpError as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = base_delay * (2**attempt) + random.uniform(0, base_delay)
+            print(f"API error {e.resp.status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
 def resolve_channel_id(youtube, handle_or_id: str) -> str:
     """Resolve a channel handle (e.g., @gabroo-tv) or ID into a channel ID.
 
@@ -29,7 +119,7 @@ def resolve_channel_id(youtube, handle_or_id: str) -> str:
     # Try new forHandle parameter if available
     try:
         req = youtube.channels().list(part="id", forHandle=text.lstrip("@"))
-        res = req.execute()
+        res = execute_with_backoff(req)
         items = res.get("items", [])
         if items:
             return items[0]["id"]
@@ -42,41 +132,95 @@ def resolve_channel_id(youtube, handle_or_id: str) -> str:
 
     # Fallback: search for channel
     q = text.lstrip("@")
-    res = youtube.search().list(part="snippet", type="channel", q=q, maxResults=5).execute()
+    req = youtube.search().list(part="snippet", type="channel", q=q, maxResults=5)
+    res = execute_with_backoff(req, cost=SEARCH_COST)
     items = res.get("items", [])
     if not items:
         raise RuntimeError(f"Could not resolve channel for '{handle_or_id}'")
     return items[0]["snippet"]["channelId"]
 
 
+def resolve_channel_ids(youtube, handles: List[str], cache_path: str) -> Dict[str, str]:
+    """Resolve several handles/IDs, caching results in a JSON file.
+
+    Handles seen before are answered from the cache, so the expensive
+    search().list fallback is paid at most once per handle.
+    """
+    cache: Dict[str, str] = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    resolved: Dict[str, str] = {}
+    for handle in handles:
+        key = handle.strip()
+        if key not in cache:
+            cache[key] = resolve_channel_id(youtube, key)
+        resolved[key] = cache[key]
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    return resolved
+
+
 def get_uploads_playlist_id(youtube, channel_id: str) -> str:
-    res = youtube.channels().list(part="contentDetails", id=channel_id).execute()
-    items = res.get("items", [])
-    if not items:
-        raise RuntimeError(f"Channel not found for id {channel_id}")
-    return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+    return get_uploads_playlist_ids(youtube, [channel_id])[channel_id]
 
 
-def list_all_video_ids(youtube, uploads_playlist_id: str) -> List[str]:
-    video_ids: List[str] = []
-    page_token = None
+def get_uploads_playlist_ids(youtube, channel_ids: List[str]) -> Dict[str, str]:
+    """Look up uploads playlists for up to 50 channels per channels().list call."""
+    uploads: Dict[str, str] = {}
+    for batch in chunked(channel_ids, 50):
+        req = youtube.channels().list(part="contentDetails", id=",".join(batch), maxResults=50)
+        for item in execute_with_backoff(req).get("items", []):
+            uploads[item["id"]] = item["contentDetails"]["relatedPlaylists"]["uploads"]
+    missing = [cid for cid in channel_ids if cid not in uploads]
+    if missing:
+        raise RuntimeError(f"Channel not found for id {', '.join(missing)}")
+    return uploads
+
+
+def iter_playlist_page_tokens(
+    youtube, uploads_playlist_id: str, page_token: Optional[str] = None
+) -> Iterator[Tuple[List[str], Optional[str]]]:
+    """Yield (video IDs, nextPageToken) for each playlist page, starting at page_token."""
     while True:
-        res = (
-            youtube.playlistItems()
-            .list(
-                part="contentDetails",
-                playlistId=uploads_playlist_id,
-                maxResults=50,
-                pageToken=page_token,
-            )
-            .execute()
+        request = youtube.playlistItems().list(
+            part="contentDetails",
+            playlistId=uploads_playlist_id,
+            maxResults=50,
+            pageToken=page_token,
         )
-        for item in res.get("items", []):
-            vid = item["contentDetails"]["videoId"]
-            video_ids.append(vid)
+        with metrics.timed("api.playlist_page"):
+            res = execute_with_backoff(request)
         page_token = res.get("nextPageToken")
+        yield [item["contentDetails"]["videoId"] for item in res.get("items", [])], page_token
         if not page_token:
             break
+
+
+def iter_playlist_pages(youtube, uploads_playlist_id: str) -> Iterator[List[str]]:
+    """Yield the video IDs of each playlist page (up to 50), newest first."""
+    for page, _ in iter_playlist_page_tokens(youtube, uploads_playlist_id):
+        yield page
+
+
+def list_all_video_ids(youtube, uploads_playlist_id: str) -> List[str]:
+    video_ids: List[str] = []
+    for page in iter_playlist_pages(youtube, uploads_playlist_id):
+        video_ids.extend(page)
+    return video_ids
+
+
+def list_new_video_ids(youtube, uploads_playlist_id: str, known: Set[str]) -> List[str]:
+    """List IDs not in known, stopping after the first page that reaches one.
+
+    The uploads playlist is ordered newest first, so once a page contains an
+    already-stored video everything after it has been seen before.
+    """
+    video_ids: List[str] = []
+    for page in iter_playlist_pages(youtube, uploads_playlist_id):
+        video_ids.extend(vid for vid in page if vid not in known)
+        if any(vid in known for vid in page):
+            break
     return video_ids
 
 
@@ -84,28 +228,98 @@ def chunked(seq: List[str], size: int) -> List[List[str]]:
     return [seq[i : i + size] for i in range(0, len(seq), size)]
 
 
-def fetch_video_details(youtube, video_ids: List[str]) -> List[Dict]:
+def fetch_video_batch(youtube, batch: List[str]) -> List[Dict]:
+    request = youtube.videos().list(
+        part="snippet,contentDetails,statistics,status",
+        id=",".join(batch),
+        maxResults=50,
+    )
+    with metrics.timed("api.video_batch"):
+        return execute_with_backoff(request).get("items", [])
+
+
+def iter_video_details(
+    youtube,
+    id_batches: Iterable[List[str]],
+    workers: int = 1,
+    client_factory: Optional[Callable] = None,
+) -> Iterator[List[Dict]]:
+    """Yield the detail items for each batch of up to 50 IDs, in batch order.
+
+    id_batches may be a lazy iterator such as iter_playlist_pages, in which
+    case paging runs on the calling thread while earlier batches are being
+    fetched. With workers > 1 the batches are fetched by a thread pool with
+    up to `workers` requests in flight (and at most 2 * workers batches
+    buffered). The API client is not thread-safe, so each worker thread
+    builds its own via client_factory (default get_youtube_client) and
+    reuses it, and its HTTP connection, for every batch it handles.
+    """
+    if workers <= 1:
+        for batch in id_batches:
+            yield fetch_video_batch(youtube, batch)
+        return
+
+    factory = client_factory or get_youtube_client
+    local = threading.local()
+
+    def fetch(batch: List[str]) -> List[Dict]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = factory()
+        return fetch_video_batch(client, batch)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        batches = iter(id_batches)
+        try:
+            while True:
+                try:
+                    batch = next(batches)
+                except StopIteration:
+                    break
+                except Exception:
+                    # Paging failed. Batches already fetched (or in flight, so
+                    # already paid for) at the front are still handed out so they
+                    # get written and checkpointed; queued ones are cancelled.
+                    for future in pending:
+                        future.cancel()
+                    while pending and not pending[0].cancelled():
+                        yield pending.popleft().result()
+                    raise
+                pending.append(pool.submit(fetch, batch))
+                # Yield from the front so output stays in playlist order
+                while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # On error or early close, don't spend quota on queued batches
+            for future in pending:
+                future.cancel()
+
+
+def fetch_video_details(
+    youtube,
+    video_ids: List[str],
+    workers: int = 1,
+    client_factory: Optional[Callable] = None,
+) -> List[Dict]:
+    """Fetch details for video_ids in 50-ID batches, keeping their order."""
     results: List[Dict] = []
-    for batch in chunked(video_ids, 50):
-        res = (
-            youtube.videos()
-            .list(
-                part="snippet,contentDetails,statistics,status",
-                id=",".join(batch),
-                maxResults=50,
-            )
-            .execute()
-        )
-        results.extend(res.get("items", []))
+    for items in iter_video_details(youtube, chunked(video_ids, 50), workers, client_factory):
+        results.extend(items)
     return results
 
 
-def iso8601_duration_to_str(iso: str) -> str:
-    # Return the original ISO 8601 duration; parsing to seconds is optional
-    return iso or ""
+def iso8601_duration_to_str(iso: str, as_seconds: bool = False) -> str:
+    # Return the original ISO 8601 duration, or whole seconds if as_seconds
+    if not as_seconds:
+        return iso or ""
+    seconds = parse_iso8601_duration(iso)
+    return "" if seconds is None else str(seconds)
 
 
-def to_row(item: Dict) -> Dict:
+def to_row(item: Dict, duration_seconds: bool = False) -> Dict:
     snippet = item.get("snippet", {})
     stats = item.get("statistics", {})
     content = item.get("contentDetails", {})
@@ -113,7 +327,7 @@ def to_row(item: Dict) -> Dict:
     title = snippet.get("title", "")
     published_at = snippet.get("publishedAt", "")
     year = published_at[:4] if published_at else ""
-    duration = iso8601_duration_to_str(content.get("duration", ""))
+    duration = iso8601_duration_to_str(content.get("duration", ""), duration_seconds)
     tags = snippet.get("tags", []) or []
     return {
         "video_id": vid,
@@ -131,57 +345,439 @@ def to_row(item: Dict) -> Dict:
     }
 
 
+def to_rows(items: List[Dict], duration_seconds: bool = False) -> List[Dict]:
+    with metrics.timed("to_row"):
+        return [to_row(item, duration_seconds) for item in items]
+
+
+FIELDNAMES = [
+    "video_id",
+    "title",
+    "published_at",
+    "year",
+    "duration",
+    "view_count",
+    "like_count",
+    "comment_count",
+    "channel_title",
+    "category_id",
+    "tags",
+    "description",
+]
+
+
 def save_csv(rows: List[Dict], path: str) -> None:
     if not rows:
         print("No rows to write.")
         return
-    fieldnames = [
-        "video_id",
-        "title",
-        "published_at",
-        "year",
-        "duration",
-        "view_count",
-        "like_count",
-        "comment_count",
-        "channel_title",
-        "category_id",
-        "tags",
-        "description",
-    ]
     with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         for r in rows:
             writer.writerow(r)
     print(f"Wrote {len(rows)} rows to {path}")
+    cache_export(path)
 
 
-def main():
+def cache_export(path: str) -> None:
+    """Also store a finished export as Parquet so analysis never re-parses the CSV."""
+    with metrics.timed("csv.cache"):
+        cached = loading.build_cache(path)
+    if cached:
+        print(f"Cached {path} as {cached}")
+
+
+def stream_csv(
+    row_batches: Iterable[List[Dict]],
+    path: str,
+    append_at: Optional[int] = None,
+    on_flush: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """Write rows batch by batch, flushing after each so a crash leaves a usable file.
+
+    If append_at is given the file is first truncated to that many bytes
+    (dropping any half-written batch) and appended to without a header.
+    on_flush(rows_in_batch, file_size) is called after every flushed batch.
+    """
+    count = 0
+    if append_at is not None:
+        os.truncate(path, append_at)
+    with open(path, "w" if append_at is None else "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        if append_at is None:
+            writer.writeheader()
+        for rows in row_batches:
+            with metrics.timed("csv.write"):
+                writer.writerows(rows)
+                f.flush()
+            count += len(rows)
+            if on_flush:
+                on_flush(len(rows), os.fstat(f.fileno()).st_size)
+    print(f"Wrote {count} rows to {path}")
+    return count
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: Dict) -> None:
+    # Write then rename so a crash mid-write never leaves a corrupt checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def crawl_to_csv(
+    youtube,
+    uploads_playlist_id: str,
+    output_path: str,
+    workers: int = 1,
+    resume: bool = False,
+    checkpoint_path: Optional[str] = None,
+    client_factory: Optional[Callable] = None,
+    duration_seconds: bool = False,
+    cache: bool = True,
+    keep_checkpoint: bool = False,
+) -> int:
+    """Crawl the whole playlist into output_path, checkpointing after every batch.
+
+    The checkpoint (default output_path + ".checkpoint.json") records the
+    nextPageToken after the last written batch, how many batches and rows
+    are done, and the CSV size at that point. Batches are written in
+    playlist order, so the completed batches are always a prefix of the
+    playlist. With resume=True an existing checkpoint is picked up and the
+    crawl continues from that page, appending to the CSV. The checkpoint is
+    removed once the last page is written, and the finished CSV is added
+    to the Parquet cache unless cache=False. With keep_checkpoint it is
+    instead kept and marked done, so resuming a finished crawl returns at
+    once; crawl_channels uses this until every channel has finished.
+    """
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint.json"
+    state = load_checkpoint(checkpoint_path) if resume else None
+    append_at = None
+    if state:
+        if state["playlist_id"] != uploads_playlist_id or state["output"] != output_path:
+            raise RuntimeError(f"Checkpoint {checkpoint_path} is for a different crawl")
+        if state.get("done"):
+            if os.path.exists(output_path) and os.path.getsize(output_path) == state["csv_bytes"]:
+                print(f"{output_path} already finished ({state['rows_written']} rows)")
+                return state["rows_written"]
+            print(f"{output_path} changed since it finished; starting from the beginning")
+            state = None
+    if state:
+        append_at = state["csv_bytes"]
+        print(
+            f"Resuming after {state['completed_batches']} batches "
+            f"({state['rows_written']} rows) from {checkpoint_path}"
+        )
+    else:
+        if resume:
+            print(f"No checkpoint at {checkpoint_path}; starting from the beginning")
+        state = {
+            "playlist_id": uploads_playlist_id,
+            "output": output_path,
+            "next_page_token": None,
+            "completed_batches": 0,
+            "rows_written": 0,
+            "csv_bytes": 0,
+        }
+
+    # nextPageToken of each page handed to iter_video_details, consumed in
+    # the same order its batches come back out
+    tokens: Deque[Optional[str]] = deque()
+
+    def id_batches() -> Iterator[List[str]]:
+        pages = iter_playlist_page_tokens(youtube, uploads_playlist_id, state["next_page_token"])
+        for page, next_token in pages:
+            tokens.append(next_token)
+            yield page
+
+    def on_flush(batch_rows: int, csv_bytes: int) -> None:
+        state["next_page_token"] = tokens.popleft()
+        state["completed_batches"] += 1
+        state["rows_written"] += batch_rows
+        state["csv_bytes"] = csv_bytes
+        save_checkpoint(checkpoint_path, state)
+
+    detail_batches = iter_video_details(youtube, id_batches(), workers, client_factory)
+    count = stream_csv(
+        (to_rows(items, duration_seconds) for items in detail_batches),
+        output_path,
+        append_at=append_at,
+        on_flush=on_flush,
+    )
+    if keep_checkpoint:
+        state["done"] = True
+        state["csv_bytes"] = os.path.getsize(output_path)
+        save_checkpoint(checkpoint_path, state)
+    elif os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    if cache:
+        cache_export(output_path)
+    return count
+
+
+def sync_channel(
+    youtube,
+    uploads_playlist_id: str,
+    store_path: str,
+    output_path: str,
+    stale_days: Optional[float] = None,
+    workers: int = 1,
+    duration_seconds: bool = False,
+) -> None:
+    """Incrementally update the local store, then export it to output_path.
+
+    Only videos missing from the store are fetched, plus (if stale_days is
+    set) stored videos whose details are older than stale_days, so their
+    view/like counts get refreshed.
+    """
+    conn = video_store.open_store(store_path, FIELDNAMES)
+    try:
+        known = video_store.known_video_ids(conn)
+        print(f"Store has {len(known)} videos; fetching new video ids…")
+        new_ids = list_new_video_ids(youtube, uploads_playlist_id, known)
+        stale_ids = [] if stale_days is None else video_store.stale_video_ids(conn, stale_days)
+        print(f"Found {len(new_ids)} new and {len(stale_ids)} stale videos")
+
+        details = fetch_video_details(youtube, new_ids + stale_ids, workers=workers)
+        with metrics.timed("store.upsert"):
+            video_store.upsert_rows(conn, to_rows(details, duration_seconds), FIELDNAMES)
+        with metrics.timed("csv.write"):
+            video_store.export_csv(conn, output_path, FIELDNAMES)
+        cache_export(output_path)
+    finally:
+        conn.close()
+
+
+def merge_csvs(paths: List[str], output_path: str) -> int:
+    """Concatenate crawl CSVs into output_path, keeping the first row per video_id."""
+    seen: Set[str] = set()
+    count = 0
+    with open(output_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.DictWriter(out, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for path in paths:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row["video_id"] in seen:
+                        continue
+                    seen.add(row["video_id"])
+                    writer.writerow(row)
+                    count += 1
+    print(f"Wrote {count} unique rows to {output_path}")
+    return count
+
+
+def crawl_channels(
+    handles: List[str],
+    output_path: str,
+    per_channel_dir: Optional[str] = None,
+    workers: int = 1,
+    resume: bool = False,
+    cache_path: str = "channel_ids.json",
+    client_factory: Optional[Callable] = None,
+    duration_seconds: bool = False,
+) -> None:
+    """Crawl several channels at once and write merged or per-channel CSVs.
+
+    Channels are crawled concurrently, one thread each with its own client
+    and detail pool, so the total time tracks the largest channel. All
+    requests draw on the shared `quota` budget. Each channel is checkpointed
+    like a single crawl, and channels that finish keep a "done" checkpoint
+    until the whole batch succeeds, so rerunning with resume=True continues
+    the failed channels and skips the finished ones.
+    With per_channel_dir set, each channel gets <dir>/<handle>.csv;
+    otherwise the channels are crawled to <output_path>.<handle>.part.csv
+    files and merged, de-duplicated by video_id, into output_path.
+    """
+    factory = client_factory or get_youtube_client
+    youtube = factory()
+    channel_ids = resolve_channel_ids(youtube, handles, cache_path)
+    uploads = get_uploads_playlist_ids(youtube, sorted(set(channel_ids.values())))
+
+    paths: Dict[str, str] = {}
+    for handle, channel_id in channel_ids.items():
+        if channel_id in paths:
+            continue  # same channel given twice
+        name = handle.lstrip("@").replace("/", "_")
+        if per_channel_dir:
+            os.makedirs(per_channel_dir, exist_ok=True)
+            paths[channel_id] = os.path.join(per_channel_dir, f"{name}.csv")
+        else:
+            paths[channel_id] = f"{output_path}.{name}.part.csv"
+
+    def crawl(channel_id: str) -> int:
+        print(f"Crawling {channel_id} into {paths[channel_id]}")
+        return crawl_to_csv(
+            factory(),
+            uploads[channel_id],
+            paths[channel_id],
+            workers=workers,
+            resume=resume,
+            client_factory=factory,
+            duration_seconds=duration_seconds,
+            cache=bool(per_channel_dir),
+            keep_checkpoint=True,
+        )
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        futures = {cid: pool.submit(crawl, cid) for cid in paths}
+        for channel_id, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error crawling {channel_id}: {e}")
+                failed.append(channel_id)
+    print(f"Quota used: {quota.used} units")
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} channel(s) failed; rerun with --resume to continue them"
+        )
+
+    if not per_channel_dir:
+        merge_csvs(list(paths.values()), output_path)
+        for path in paths.values():
+            os.remove(path)
+        cache_export(output_path)
+    for path in paths.values():
+        if os.path.exists(path + ".checkpoint.json"):
+            os.remove(path + ".checkpoint.json")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     # Defaults for Gabroo TV
-    default_handle = "@gabroo-tv"
-    output_path = "gabroo_videos_full.csv"
+    parser = argparse.ArgumentParser(description="Export a YouTube channel's videos to CSV.")
+    parser.add_argument("channel", nargs="?", default="@gabroo-tv", help="channel handle or ID")
+    parser.add_argument("output", nargs="?", default="gabroo_videos_full.csv", help="CSV output path")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="number of video detail requests in flight at once (1 = sequential)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted full crawl from its checkpoint file",
+    )
+    parser.add_argument(
+        "--duration-seconds",
+        action="store_true",
+        help="store durations as integer seconds instead of ISO 8601 (PT8M47S)",
+    )
+    parser.add_argument(
+        "--channels",
+        nargs="+",
+        metavar="CHANNEL",
+        help="crawl several handles/IDs concurrently instead of the positional channel",
+    )
+    parser.add_argument(
+        "--per-channel-dir",
+        help="with --channels, write one CSV per channel here instead of one merged output",
+    )
+    parser.add_argument(
+        "--channel-cache",
+        default="channel_ids.json",
+        help="JSON cache of resolved channel IDs",
+    )
+    parser.add_argument(
+        "--quota-budget",
+        type=int,
+        help="stop once this many API quota units have been spent",
+    )
+    parser.add_argument(
+        "--store",
+        help="SQLite store for incremental sync; only new (and stale) videos are fetched",
+    )
+    parser.add_argument(
+        "--stale-days",
+        type=float,
+        help="with --store, also refetch videos whose details are older than this",
+    )
+    parser.add_argument(
+        "--report",
+        help="write a JSON run report (timings, API calls, quota, memory) here",
+    )
+    parser.add_argument(
+        "--profile",
+        help="dump cProfile stats of the slowest stage here",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="with --report, also record each stage's peak traced allocation (slower)",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    with metrics.recording(args.report, args.profile, args.trace_memory):
+        run(args)
 
-    handle_or_id = sys.argv[1] if len(sys.argv) > 1 else default_handle
-    if len(sys.argv) > 2:
-        output_path = sys.argv[2]
+
+def run(args: argparse.Namespace) -> None:
+    output_path = args.output
+    quota.limit = args.quota_budget
+
+    if args.channels:
+        try:
+            with metrics.stage("crawl_channels"):
+                crawl_channels(
+                    args.channels,
+                    output_path,
+                    per_channel_dir=args.per_channel_dir,
+                    workers=args.workers,
+                    resume=args.resume,
+                    cache_path=args.channel_cache,
+                    duration_seconds=args.duration_seconds,
+                )
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
 
     yt = get_youtube_client()
     try:
-        channel_id = resolve_channel_id(yt, handle_or_id)
-        print(f"Channel ID: {channel_id}")
-
-        uploads_id = get_uploads_playlist_id(yt, channel_id)
-        print("Fetching video ids…")
-        video_ids = list_all_video_ids(yt, uploads_id)
-        print(f"Found {len(video_ids)} videos")
-
-        print("Fetching video details…")
-        details = fetch_video_details(yt, video_ids)
-        rows = [to_row(item) for item in details]
-        save_csv(rows, output_path)
+        with metrics.stage("resolve_channel"):
+            channel_id = resolve_channel_id(yt, args.channel)
+            print(f"Channel ID: {channel_id}")
+            uploads_id = get_uploads_playlist_id(yt, channel_id)
+
+        if args.store:
+            with metrics.stage("sync"):
+                sync_channel(
+                    yt,
+                    uploads_id,
+                    args.store,
+                    output_path,
+                    args.stale_days,
+                    args.workers,
+                    args.duration_seconds,
+                )
+            return
+
+        print("Fetching video ids and details…")
+        with metrics.stage("crawl") as record:
+            record["rows_out"] = crawl_to_csv(
+                yt,
+                uploads_id,
+                output_path,
+                workers=args.workers,
+                resume=args.resume,
+                duration_seconds=args.duration_seconds,
+            )
     except HttpError as e:
         print(f"YouTube API error: {e}")
+        if not args.store:
+            print("Progress is checkpointed; rerun with --resume to continue.")
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}")
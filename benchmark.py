@@ -0,0 +1,145 @@
+"""Time the crawl and cleaning paths on synthetic data.
+
+For each size (default 10k, 100k and 1M rows) this generates a
+gabroo_videos_full-shaped dataset (see synthetic_data.py) and measures:
+
+  fetch      crawl_to_csv against StubYouTube, with per-request latency
+  to_row     converting API items to CSV rows
+  load       load_videos on the written CSV
+  durations  parse_duration_series
+  normalize  parse_titles and apply_aliases
+  scoring    team_scores and competition_scores
+
+Each stage is timed once, then run again under tracemalloc for its peak
+memory (skip that with --no-memory). The API stages are capped at
+--api-rows because they are dominated by the simulated latency. Save a run
+with --json and pass it as --baseline to a later run to see the speedup
+per stage.
+
+    python benchmark.py --rows 10000 100000 --json before.json
+    python benchmark.py --rows 10000 100000 --baseline before.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+import GTVAPICALL
+from durations import parse_duration_series
+from loading import load_videos
+from name_aliases import apply_aliases
+from scoring import competition_scores, team_scores
+from synthetic_data import PLAYLIST_ID, StubYouTube, synthetic_frame, to_items, write_videos_csv
+from title_parsing import parse_titles
+
+
+def measure(func: Callable[[], object], memory: bool = True) -> Dict[str, Optional[float]]:
+    """Wall time of one call, and its peak traced allocation in a second call."""
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak_mb}
+
+
+def normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    df = frame[["video_id", "title"]].join(parse_titles(frame["title"].str.lower().str.strip()))
+    return apply_aliases(df)
+
+
+def score(df: pd.DataFrame) -> pd.DataFrame:
+    return competition_scores(df, team_scores(df))
+
+
+def bench_size(
+    rows: int, api_rows: int, latency: float, workers: int, memory: bool, workdir: str
+) -> List[Dict]:
+    frame = synthetic_frame(rows)
+    api_frame = frame.head(api_rows)
+    items = to_items(api_frame)
+    csv_path = os.path.join(workdir, f"videos_{rows}.csv")
+    write_videos_csv(csv_path, rows)
+    normalized = normalize(frame).dropna(subset=["team_name", "competition_name"])
+
+    def fetch():
+        stub = StubYouTube(len(api_frame), latency=latency)
+        out = os.path.join(workdir, "fetch.csv")
+        GTVAPICALL.crawl_to_csv(stub, PLAYLIST_ID, out, workers=workers, client_factory=lambda: stub, cache=False)
+
+    stages = [
+        ("fetch", len(api_frame), fetch),
+        ("to_row", len(items), lambda: [GTVAPICALL.to_row(item) for item in items]),
+        ("load", rows, lambda: load_videos(csv_path, use_cache=False)),
+        ("durations", rows, lambda: parse_duration_series(frame["duration"], report=False)),
+        ("normalize", rows, lambda: normalize(frame)),
+        ("scoring", len(normalized), lambda: score(normalized)),
+    ]
+    results = []
+    for name, stage_rows, func in stages:
+        result = {"rows": rows, "stage": name, "stage_rows": stage_rows, **measure(func, memory)}
+        results.append(result)
+        peak = "" if result["peak_mb"] is None else f"{result['peak_mb']:10.1f} MB"
+        print(f"{rows:>9} {name:<10} {stage_rows:>9} rows {result['seconds']:9.3f} s {peak}", flush=True)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict]) -> None:
+    before = {(r["rows"], r["stage"]): r for r in baseline}
+    print("\nrows      stage       baseline s    now s   speedup")
+    for r in results:
+        old = before.get((r["rows"], r["stage"]))
+        if old:
+            print(
+                f"{r['rows']:>9} {r['stage']:<10} {old['seconds']:10.3f} {r['seconds']:8.3f}"
+                f" {old['seconds'] / max(r['seconds'], 1e-9):8.2f}x"
+            )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark crawl and cleaning stages on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--api-rows",
+        type=int,
+        default=20_000,
+        help="cap on rows for the fetch and to_row stages",
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stub API request")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent detail requests in fetch")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            results.extend(
+                bench_size(rows, min(rows, args.api_rows), args.latency, args.workers, not args.no_memory, workdir)
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
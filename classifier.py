@@ -0,0 +1,200 @@
+"""Label videos as competition, exhibition, mixer or other.
+
+A softmax (multinomial logistic) regression over hashed binary features:
+tokens of the title, tags and description, with each field kept apart so
+"exhibition" in a title and in a description are different features, plus
+a log2 duration bucket. Training and scoring are numpy gathers and
+bincounts over (video, feature) pairs, with no sparse-matrix dependency, so
+the whole export trains and scores in seconds on CPU.
+
+classify() keeps the trained model and its predictions under
+.columnar_cache/classifier/, both keyed by the caller's model key. A sync
+that only adds uploads reuses the model and scores only the new videos, plus
+any whose title, tags, description or duration changed. Changing the key
+(e.g. after editing the curated exclusions or the labeling rules) retrains.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+from durations import parse_duration_series
+from text_index import TOKEN_RE
+
+LABELS: Tuple[str, ...] = ("competition", "exhibition", "mixer", "other")
+N_FEATURES = 1 << 18
+MODEL_DIR = os.path.join(columnar_cache.CACHE_DIR_NAME, "classifier")
+FEATURE_COLUMNS = ["video_id", "title", "tags", "description", "duration"]
+FIELD_PREFIXES = (("title", "t:"), ("tags", "g:"), ("description", "d:"))
+
+
+def reason_label(reason: str) -> str:
+    """Map an excluded_videos.csv reason onto a label."""
+    reason = reason.lower()
+    for label in ("exhibition", "mixer"):
+        if label in reason:
+            return label
+    return "other"
+
+
+def features(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Unique (row position, hashed feature) pairs for every row of df."""
+    positions = pd.RangeIndex(len(df))
+    names = []
+    for column, prefix in FIELD_PREFIXES:
+        tokens = df[column].astype(object).fillna("").str.lower().str.findall(TOKEN_RE)
+        names.append(prefix + tokens.set_axis(positions).explode().dropna())
+    seconds = parse_duration_series(df["duration"], report=False).to_numpy()
+    buckets = np.floor(np.log2(np.nan_to_num(seconds, nan=0.0) + 1)).astype(int).astype(str)
+    names.append(pd.Series(np.char.add("len:", buckets), index=positions))
+
+    names = pd.concat(names)
+    docs = names.index.to_numpy(dtype=np.int64)
+    feats = (pd.util.hash_array(names.to_numpy(dtype=object)) % N_FEATURES).astype(np.int64)
+    pairs = np.unique(docs * N_FEATURES + feats)
+    return pairs // N_FEATURES, pairs % N_FEATURES
+
+
+def _row_values(docs: np.ndarray, n: int) -> np.ndarray:
+    # Scale each row to unit length so long descriptions don't drown out titles
+    return 1 / np.sqrt(np.bincount(docs, minlength=n)[docs])
+
+
+def _logits(weights: np.ndarray, bias: np.ndarray, docs, cols, values, n: int) -> np.ndarray:
+    scores = np.tile(bias, (n, 1))
+    for k in range(len(bias)):
+        scores[:, k] += np.bincount(docs, weights=weights[k, cols] * values, minlength=n)
+    return scores
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    probs = np.exp(scores)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+@dataclass
+class SoftmaxModel:
+    vocabulary: np.ndarray  # sorted hashed features seen in training
+    weights: np.ndarray  # (labels, len(vocabulary))
+    bias: np.ndarray  # (labels,)
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        docs, feats = features(df)
+        cols = np.searchsorted(self.vocabulary, feats).clip(max=len(self.vocabulary) - 1)
+        known = self.vocabulary[cols] == feats
+        values = _row_values(docs, len(df)) * known
+        return _softmax(_logits(self.weights, self.bias, docs, cols, values, len(df)))
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        probs = self.predict_proba(df)
+        best = probs.argmax(axis=1)
+        return pd.DataFrame(
+            {
+                "video_id": df["video_id"].to_numpy(),
+                "label": pd.Categorical.from_codes(best, LABELS),
+                "confidence": probs[np.arange(len(df)), best],
+            }
+        )
+
+
+def train(
+    df: pd.DataFrame,
+    labels: pd.Series,
+    epochs: int = 200,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4,
+) -> SoftmaxModel:
+    """Fit on the rows of df whose label (aligned with df) is not null.
+
+    Full-batch AdaGrad on class-weighted cross entropy, so the few dozen
+    mixers and exhibitions count as much as the competitions.
+    """
+    labeled = labels.notna().to_numpy()
+    y = pd.Categorical(labels[labeled], categories=LABELS).codes.astype(np.int64)
+    n, k = len(y), len(LABELS)
+    docs, feats = features(df[labeled])
+    vocabulary, cols = np.unique(feats, return_inverse=True)
+    values = _row_values(docs, n)
+    class_weight = n / (k * np.maximum(np.bincount(y, minlength=k), 1))
+    sample_weight = class_weight[y] / class_weight[y].sum()
+    targets = np.eye(k)[y]
+
+    weights = np.zeros((k, len(vocabulary)))
+    bias = np.zeros(k)
+    weights_sq = np.full_like(weights, 1e-8)
+    bias_sq = np.full_like(bias, 1e-8)
+    for _ in range(epochs):
+        errors = (_softmax(_logits(weights, bias, docs, cols, values, n)) - targets) * sample_weight[:, None]
+        grad = np.stack(
+            [np.bincount(cols, weights=errors[docs, c] * values, minlength=len(vocabulary)) for c in range(k)]
+        )
+        grad += l2 * weights
+        grad_bias = errors.sum(axis=0)
+        weights_sq += grad**2
+        bias_sq += grad_bias**2
+        weights -= learning_rate * grad / np.sqrt(weights_sq)
+        bias -= learning_rate * grad_bias / np.sqrt(bias_sq)
+    return SoftmaxModel(vocabulary, weights.astype(np.float32), bias)
+
+
+def _load_model(path: str) -> Optional[SoftmaxModel]:
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as saved:
+        return SoftmaxModel(saved["vocabulary"], saved["weights"], saved["bias"])
+
+
+def _save_model(model: SoftmaxModel, path: str) -> None:
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, vocabulary=model.vocabulary, weights=model.weights, bias=model.bias)
+    os.replace(tmp_path, path)
+
+
+def _prune(keep_key: str, model_dir: str) -> None:
+    for entry in os.listdir(model_dir):
+        if f".{keep_key}." not in entry:
+            os.remove(os.path.join(model_dir, entry))
+
+
+def classify(
+    videos: pd.DataFrame, labels: pd.Series, key: str, model_dir: str = MODEL_DIR
+) -> pd.DataFrame:
+    """video_id, label and confidence for every row of videos.
+
+    labels (aligned with videos, null where unknown) is only used when no
+    model is stored under key yet, so key must change whenever the labels'
+    rules do. Predictions already cached under key are reused for videos
+    whose features are unchanged; new or edited videos are scored.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    model_path = os.path.join(model_dir, f"model.{key}.npz")
+    predictions_path = os.path.join(model_dir, f"predictions.{key}.parquet")
+
+    model = _load_model(model_path)
+    if model is None:
+        print(f"Training classifier on {int(labels.notna().sum())} labeled videos")
+        model = train(videos, labels)
+        _prune(key, model_dir)
+        _save_model(model, model_path)
+
+    # Each prediction remembers a hash of the features it was scored from
+    hashes = pd.util.hash_pandas_object(videos[FEATURE_COLUMNS], index=False).to_numpy()
+    cached = columnar_cache.read_cached(predictions_path)
+    if cached is None or "feature_hash" not in cached:
+        cached = pd.DataFrame(columns=["video_id", "label", "confidence", "feature_hash"])
+    known = pd.MultiIndex.from_arrays([cached["video_id"], cached["feature_hash"].astype("uint64")])
+    stale = ~pd.MultiIndex.from_arrays([videos["video_id"], hashes]).isin(known)
+    if stale.any():
+        print(f"Classifying {int(stale.sum())} videos")
+        scored = model.predict(videos[stale]).assign(feature_hash=hashes[stale])
+        cached = scored if cached.empty else pd.concat([cached, scored], ignore_index=True)
+        cached = cached.drop_duplicates("video_id", keep="last")
+        cached["label"] = pd.Categorical(cached["label"], categories=LABELS)
+        columnar_cache.write_parquet(cached, predictions_path)
+
+    by_id = cached.drop_duplicates("video_id", keep="last").set_index("video_id")
+    return by_id.loc[videos["video_id"].drop_duplicates(), ["label", "confidence"]].reset_index()
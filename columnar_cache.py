@@ -0,0 +1,67 @@
+"""Content-addressed Parquet cache for crawl exports and cleaned datasets.
+
+A cached frame is stored as <dir>/.columnar_cache/<name>.<digest>.parquet,
+where digest hashes the source file's bytes together with a key describing
+how it was parsed. An unchanged CSV always maps to the same file, so it is
+parsed once; any edit produces a new digest, and stale entries for the same
+name are removed when the new one is written. Parquet needs pyarrow, an
+optional dependency; without it every function here is a no-op.
+"""
+import hashlib
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+CACHE_DIR_NAME = ".columnar_cache"
+
+
+def have_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def file_digest(path: str, key: str = "") -> str:
+    digest = hashlib.sha256(key.encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def cache_path(source_path: str, key: str = "") -> str:
+    folder = os.path.join(os.path.dirname(os.path.abspath(source_path)), CACHE_DIR_NAME)
+    name = os.path.basename(source_path)
+    return os.path.join(folder, f"{name}.{file_digest(source_path, key)}.parquet")
+
+
+def read_cached(path: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Return the cached frame (only `columns` if given), or None on a miss."""
+    if not have_pyarrow() or not os.path.exists(path):
+        return None
+    return pd.read_parquet(path, columns=columns)
+
+
+def write_parquet(df: pd.DataFrame, path: str, index: bool = False) -> None:
+    """Write df as zstd-compressed Parquet, atomically; dtypes round-trip."""
+    if not have_pyarrow():
+        return
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, compression="zstd", index=index)
+    os.replace(tmp_path, path)
+
+
+def write_cached(df: pd.DataFrame, path: str) -> None:
+    """Store df at a cache_path() location, dropping older digests of the same source."""
+    if not have_pyarrow():
+        return
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    prefix = os.path.basename(path).rsplit(".", 2)[0] + "."
+    for entry in os.listdir(folder):
+        if entry.startswith(prefix) and entry.count(".") == prefix.count(".") + 1:
+            os.remove(os.path.join(folder, entry))
+    write_parquet(df, path)
@@ -0,0 +1,44 @@
+"""Compact in-memory schema for the cleaned video table.
+
+After cleaning, most columns are either short repeated labels or small
+numbers, yet they arrive as object-dtype strings and int64. compact_videos
+converts them in one pass:
+
+  team_name, competition_name   category (a few hundred distinct names)
+  placings                      uint8 code, 0 = unplaced, 1-3 = place
+  duration                      int32 seconds
+  video_id, title, published_at pyarrow-backed strings, when pyarrow is installed
+
+year and comp_year are already Int16 and the counts Int64 (see
+loading.VIDEO_DTYPES). Descriptions are dropped by the filter stage once
+nothing else needs them. Together this makes the table several times
+smaller. frame_mb() is what the pipeline reports per stage.
+"""
+import pandas as pd
+
+import columnar_cache
+from scoring import placing_codes
+
+CATEGORY_COLUMNS = ["team_name", "competition_name"]
+STRING_COLUMNS = ["video_id", "title", "published_at"]
+
+
+def frame_mb(df: pd.DataFrame) -> float:
+    """Deep memory footprint of df in MB."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def compact_videos(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    if "placings" in df:
+        df["placings"] = placing_codes(df["placings"]).astype("uint8")
+    if "duration" in df:
+        df["duration"] = df["duration"].astype("int32")
+    if columnar_cache.have_pyarrow():
+        for column in STRING_COLUMNS:
+            if column in df:
+                df[column] = df[column].astype("string[pyarrow]")
+    return df
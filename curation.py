@@ -0,0 +1,63 @@
+"""Manual curation applied on top of the automatic cleaning.
+
+excluded_videos.csv lists video_ids to drop (with a reason), and
+comp_year_overrides.csv fixes comp_year for a video_id or for every title
+containing title_pattern. Both files are loaded once and applied in a
+single vectorized step. Entries that no longer match any row are reported
+so the lists can be pruned.
+"""
+import os
+from typing import Dict
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXCLUSIONS_PATH = os.path.join(HERE, "excluded_videos.csv")
+OVERRIDES_PATH = os.path.join(HERE, "comp_year_overrides.csv")
+
+
+def load_exclusions(path: str = EXCLUSIONS_PATH) -> Dict[str, str]:
+    """Return {video_id: reason} from the exclusion file."""
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return dict(zip(table["video_id"], table["reason"]))
+
+
+def load_comp_year_overrides(path: str = OVERRIDES_PATH) -> pd.DataFrame:
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    table["comp_year"] = table["comp_year"].astype(int)
+    return table
+
+
+def apply_exclusions(df: pd.DataFrame, exclusions: Dict[str, str], report: bool = True) -> pd.DataFrame:
+    """Drop every row whose video_id is in exclusions."""
+    excluded = df["video_id"].isin(exclusions.keys())
+    if report:
+        unmatched = set(exclusions) - set(df.loc[excluded, "video_id"])
+        if unmatched:
+            print(f"{len(unmatched)} excluded video_ids match no rows: {sorted(unmatched)}")
+    return df[~excluded]
+
+
+def apply_comp_year_overrides(
+    df: pd.DataFrame, overrides: pd.DataFrame, report: bool = True
+) -> pd.DataFrame:
+    """Set comp_year from the override table.
+
+    video_id overrides are applied with one indexed lookup; title_pattern
+    overrides (a handful of recurring misnumbered events) are applied after
+    them in file order.
+    """
+    by_id = overrides[overrides["video_id"] != ""].set_index("video_id")["comp_year"]
+    new_years = df["video_id"].map(by_id)
+    df.loc[new_years.notna(), "comp_year"] = new_years.dropna()
+    unmatched = set(by_id.index) - set(df.loc[new_years.notna(), "video_id"])
+
+    for _, row in overrides[overrides["title_pattern"] != ""].iterrows():
+        mask = df["title"].str.contains(row["title_pattern"], na=False)
+        df.loc[mask, "comp_year"] = row["comp_year"]
+        if not mask.any():
+            unmatched.add(row["title_pattern"])
+
+    if report and unmatched:
+        print(f"{len(unmatched)} comp_year overrides match no rows: {sorted(unmatched)}")
+    return df
@@ -0,0 +1,46 @@
+"""ISO 8601 duration parsing for YouTube's contentDetails.duration (e.g. PT8M47S).
+
+parse_iso8601_duration handles one value at crawl time; parse_duration_series
+does a whole column in one vectorized pass. Both use DURATION_PATTERN, which
+also accepts plain integers so columns already stored as seconds pass through.
+"""
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# P[nD][T[nH][nM][nS]] with at least one number, or a bare number of seconds
+DURATION_PATTERN = r"^(?:P(?=.*\d)(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?|(\d+))$"
+DURATION_RE = re.compile(DURATION_PATTERN)
+
+# Seconds per captured group: days, hours, minutes, seconds, bare seconds
+_UNIT_SECONDS = np.array([86400, 3600, 60, 1, 1], dtype=float)
+
+
+def parse_iso8601_duration(text: str) -> Optional[int]:
+    """Return the duration in seconds, or None if text is not a duration."""
+    match = DURATION_RE.match((text or "").strip())
+    if not match:
+        return None
+    return sum(int(g) * int(w) for g, w in zip(match.groups(), _UNIT_SECONDS) if g)
+
+
+def parse_duration_series(durations: pd.Series, report: bool = True) -> pd.Series:
+    """Convert a column of ISO 8601 durations to float seconds.
+
+    Values that don't parse become NaN; with report=True their count and a
+    few examples are printed instead of raising.
+    """
+    if pd.api.types.is_numeric_dtype(durations):
+        return durations.astype(float)
+    parts = durations.str.strip().str.extract(DURATION_PATTERN).astype(float).to_numpy()
+    missing = np.isnan(parts)
+    seconds = np.where(missing, 0, parts) @ _UNIT_SECONDS
+    seconds[missing.all(axis=1)] = np.nan
+    result = pd.Series(seconds, index=durations.index, name=durations.name)
+
+    bad = durations[result.isna() & durations.notna()]
+    if report and len(bad):
+        print(f"{len(bad)} unparseable durations set to NaN, e.g. {bad.unique()[:5].tolist()}")
+    return result
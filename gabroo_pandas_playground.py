@@ -1,350 +1,253 @@
+import inspect
+import os
+
 import pandas as pd
 import numpy as np
 
+import classifier
+import columnar_cache
+import compact
+import curation
+import durations
+import loading
+import metrics
+import name_aliases
+import rankings
+import scoring
+import text_index
+import title_parsing
+from columnar_cache import file_digest, write_parquet
+from compact import compact_videos
+from curation import (
+    apply_comp_year_overrides,
+    apply_exclusions,
+    load_comp_year_overrides,
+    load_exclusions,
+)
+from loading import ANALYSIS_COLUMNS, load_videos
+from classifier import FEATURE_COLUMNS, classify, reason_label
+from name_aliases import apply_aliases
+from name_dedup import suggest_aliases, write_suggestions
+from pipeline import Stage, run_pipeline
+from rankings import (
+    elo_table,
+    read_elo_history,
+    read_yearly_table,
+    refresh_yearly_table,
+    rolling_team_table,
+    update_elo,
+)
+from scoring import PLACING_WEIGHTS, competition_scores, team_scores
+from text_index import index_for
+from title_parsing import parse_titles
+
 
 
 link = "gabroo_videos_full.csv"
-df = pd.read_csv(link)
 
 
-df["title"] = df["title"].str.lower().str.strip()
+## Keyword filters are lookups in the inverted index over title, tags and
+## description (see text_index.py for the query syntax)
+def matching(df, query):
+    return index_for(link).matches(df["video_id"], query)
 
-mask_first = df["title"].str.contains("first place", case=False, na=False) 
-mask_second = df["title"].str.contains("second place", case=False, na=False)
-mask_third = df["title"].str.contains("third place", case=False, na=False)
 
-## np.select(condlist, choicelist, default=0)
-df["placings"] = np.select(condlist=[mask_first,mask_second,mask_third], choicelist=["1", "2", "3"],default="None")
+## Load only the columns we use, with durations in seconds. Videos of 120
+## seconds or less are dropped while reading, then exhibition/giddha titles.
+def load_stage():
+    df = load_videos(link, columns=ANALYSIS_COLUMNS, min_duration=120)
+    df["duration"] = df["duration"].astype(int) ## convert everything to integers
+    return df[~matching(df, "title:exhibition* OR title:giddha*")]
 
 
-# Clean up YT duration using Regex
+## Drop hand-curated non-competition videos (see excluded_videos.csv)
+def curate_stage(df):
+    return apply_exclusions(df, load_exclusions())
 
 
-# Case 1: Seconds only (PT47S → 47)
-df.loc[df["duration"].str.contains(r"^PT\d+S$", regex=True, na=False), "duration"] = (
-    df["duration"].str.replace(r"PT(\d+)S", r"\1", regex=True)
-)
+def filter_stage(df):
+    df["title"] = df["title"].str.lower().str.strip()
 
-# Case 2: Minutes + Seconds (PT8M47S → 527, PT5M30S → 330)
-mask = df["duration"].str.contains(r"^PT\d+M\d+S$", regex=True, na=False)
-df.loc[mask, "duration"] = (
-    df.loc[mask, "duration"]
-      .str.extract(r"PT(\d+)M(\d+)S")     # get minutes + seconds
-      .fillna(0)                          # replace NaN with 0
-      .astype(int)                        # convert to ints
-      .apply(lambda x: x[0] * 60 + x[1], axis=1)  # compute total seconds
-)
+    ## Filter out exhibition performances mentioned only in the description
+    delete_exh_description = matching(df, "description:exhibition*")
 
-# Case 3: Minutes only (PT2M → 120)
-df.loc[df["duration"].str.contains(r"^PT\d+M$", regex=True, na=False), "duration"] = (
-    df["duration"].str.replace(
-        r"PT(\d+)M",
-        lambda m: str(int(m.group(1)) * 60),
-        regex=True
-    )
-)
+    ## Descriptions are only needed for the filter above (and the text index)
+    return df[~delete_exh_description].drop(columns="description")
 
-# Case 4: Hours + Minutes + Seconds (PT1H2M3S)
-mask = df["duration"].str.contains(r"^PT\d+H\d+M\d+S$", regex=True, na=False)
-df.loc[mask, "duration"] = (
-    df.loc[mask, "duration"]
-      .str.extract(r"PT(\d+)H(\d+)M(\d+)S")
-      .fillna(0)
-      .astype(int)
-      .apply(lambda x: x[0]*3600 + x[1]*60 + x[2], axis=1)
-)
 
-# Case 5: Hours + Minutes (PT3H50M)
-mask = df["duration"].str.contains(r"^PT\d+H\d+M$", regex=True, na=False)
-df.loc[mask, "duration"] = (
-    df.loc[mask, "duration"]
-      .str.extract(r"PT(\d+)H(\d+)M")
-      .fillna(0)
-      .astype(int)
-      .apply(lambda x: x[0]*3600 + x[1]*60, axis=1)
-)
+## Extract placing, competition, team and year from the title in one pass
+def titles_stage(df):
+    titles = parse_titles(df["title"])
+    df = df.join(titles[["placings", "competition_name", "team_name", "comp_year"]])
 
-# Case 6: Hours only (PT2H)
-mask = df["duration"].str.contains(r"^PT\d+H$", regex=True, na=False)
-df.loc[mask, "duration"] = (
-    df.loc[mask, "duration"]
-      .str.replace(r"PT(\d+)H", lambda m: str(int(m.group(1))*3600), regex=True)
-)
+    # check for blanks in comp name
+    blank = df["competition_name"] == ""
+    nas = df["competition_name"].isna()
+    maskit = blank | nas 
+    return df[~maskit]
 
-df["duration"] = df["duration"].astype(int) ## convert everything to integers
 
-## Filter out exhibition performances
-delete_exh_title = df["title"].str.contains("exhibition", case=False, na=False)
-delete_exh_description = df["description"].str.contains("Exhibition", case=False, na=False)
-delete_giddha = df["title"].str.contains("giddha", case=False, na=False)
-
-delete_exh = delete_exh_title | delete_exh_description | delete_giddha ## Use | instead of 'or'
-df = df[~delete_exh]
-
-## Filter videos with during <120 seconds
-delete_sec = df["duration"] > 120
-df = df[delete_sec]
-
-
-## Extract Competition Names 
-def get_competition_name(title):
-    if " at " in title:
-        return title.split(" at " , 1)[1].strip() ## maxsplit = 1
-    elif " @ " in title:
-        return title.split("@" , 1)[1].strip()
-    elif "-" in title:
-        return title.split("-" , 1)[1].strip()
-    else:
-        return None
-
-
-df["competition_name"] = df["title"].apply(get_competition_name)
-df["competition_name"] = df["competition_name"].str.replace(r"(\b\d{4}\b)", "", regex=True).str.strip()
-
-
-## Extract Team Names
-def get_team_name(title):
-    idx_at = title.find(" at ") if " at " in title else float("inf")
-    idx_dash = title.find("-") if "-" in title else float("inf")
-    idx_at_symbol = title.find(" @ ") if " @ " in title else float("inf")
-    
-    # find which delimiter appears first
-    first_idx = min(idx_at, idx_dash, idx_at_symbol)
-
-    if first_idx == float("inf"):
-        return None  # no delimiter found
-    
-    return title[:first_idx].strip()
-
-df["team_name"] = df["title"].apply(get_team_name)
-
-
-# check for blanks in comp name
-blank = df["competition_name"] == ""
-nas = df["competition_name"].isna()
-maskit = blank | nas 
-df = df[~maskit]
-
-
-
-# Year Competition
-df["comp_year"] = df["title"].str.extract(r"(\b\d{4}\b)") 
-
-## Manual Fixes for comp_year
-df.loc[df["video_id"] == "snYwCBWewY4", "comp_year"] = "2014" ## Burgh Video
-df.loc[df["video_id"] == "k_HlF40BjtA", "comp_year"] = "2024" ## GTV spelling error
-df.loc[df["video_id"] == "mMiiWLM7bZ4", "comp_year"] = "2016" ## Bhangra Blowout 23
-df.loc[df["title"].str.contains("bhangra fever 4") , "comp_year"] = "2013" ## Bhangra Fever 4
-df.loc[df["title"].str.contains("bhangra fever 5") , "comp_year"] = "2014" ## Bhangra Fever 5
-df.loc[df["title"].str.contains("bhangra fever 6") , "comp_year"] = "2015" ## Bhangra Fever 6
-df.loc[df["title"].str.contains("dhol di awaz 13") , "comp_year"] = "2010" ## Dhol Di Awaz
-
-
-# Double-check for videos under 400 seconds
-df = df[df["video_id"] != "a2zdadcBDUw"] # random vid
-df = df[df["video_id"] != "QtXtpBeRPGg"] # award ceremony
-df = df[df["video_id"] != "MQf2NjkXc8s"] # SPD Exhibition
-df = df[df["video_id"] != "qscV-WWHMtY"] # Random Danceoff
-
-# DCMA's exhibitions
-df = df[df["video_id"] != "5fOWygmy4d8"] 
-df = df[df["video_id"] != "m87S7RNlLTI"]
-df = df[df["video_id"] != "WfbZhgy8bzk"] 
-df = df[df["video_id"] != "TRSSikm32ng"] 
-df = df[df["video_id"] != "4uBj882moJA"] 
-df = df[df["video_id"] != "vtoi7234V1c"]
-df = df[df["video_id"] != "PfvbSKFtDTE"] 
-df = df[df["video_id"] != "a07QZuChn6c"] 
-
-
-df = df[df["video_id"] != "Ft187itSZro"] 
-
-
-df = df[df["video_id"] != "3rHRENS_Kpk"] # random vid
-df = df[df["video_id"] != "pU8SjN2U6_o"] # mixer games
-df = df[df["video_id"] != "DdD1nT60rOw"] # random vid
-df = df[df["video_id"] != "4aMLteI9jAk"] # random vid
-df = df[df["video_id"] != "3sZJ7iul6fM"] # random vid
-df = df[df["video_id"] != "O4vLMYDt9x4"] # random vid
-df = df[df["video_id"] != "-517TVVq7VU"] # random vid
-df = df[df["video_id"] != "i3SnSzANYXI"] # random vid
-df = df[df["video_id"] != "QxlWwyDq9b8"] # random vid
-df = df[df["video_id"] != "Da1bgoUBpck"] # random vid
-df = df[df["video_id"] != "YLHdYt0Dsmo"] # behind the scenes
-df = df[df["video_id"] != "nlygqWsE3Q0"] # random vid
-df = df[df["video_id"] != "DzxmqV3yrXs"] # random vid
-df = df[df["video_id"] != "2KadPrj1BMY"] # random vid
-df = df[df["video_id"] != "DlrTz9_8cDQ"] # random vid
-df = df[df["video_id"] != "ymNt9iwa-Xk"] # random vid
-df = df[df["video_id"] != "4NHpbgxpAHQ"] # random vid
-df = df[df["video_id"] != "XJC4QMl7ZhI"] # random vid
-df = df[df["video_id"] != "ZbPStFC0Fv8"] # random vid
-df = df[df["video_id"] != "cno0aQLLJGk"] # random vid
-df = df[df["video_id"] != "wTrExK0IxLU"] # random vid
-df = df[df["video_id"] != "D98-KEiPA_Q"] # random vid
-df = df[df["video_id"] != "QEgMSMHsuPM"] # random vid
-df = df[df["video_id"] != "rPfY_FxRVxg"] # random vid
-df = df[df["video_id"] != "pAh6aXpVlKs"] # random vid
-df = df[df["video_id"] != "eyzpPuLr-hg"] # random vid
-df = df[df["video_id"] != "0M8tLMSlgNc"] # random vid
-df = df[df["video_id"] != "CO4XWwGq8Yk"] # random vid
-df = df[df["video_id"] != "bKtQDphMaLE"] # random vid
-df = df[df["video_id"] != "bKtQDphMaLE"] # random vid
-df = df[df["video_id"] != "HGyfMqNLFk0"] # random vid
-
-# check for blanks in comp year
-blank = df["comp_year"] == ""
-nas = df["comp_year"].isna()
-maskitt = blank | nas 
-df = df[~maskitt]
-
-
-# Restrict to post 2008 data
-discard2006 = df["comp_year"].str.contains("2006")
-discard2007 = df["comp_year"].str.contains("2007")
-discard2008 = df["comp_year"].str.contains("2008")
-discard2009 = df["comp_year"].str.contains("2009")
-
-discardboth = discard2006 | discard2007 | discard2008 | discard2009
-df = df[~discardboth]
-
-
-
-# Ensure consistent naming conventions for competitions
-df.loc[df["competition_name"].str.contains("burgh"), "competition_name"] = "bhangra at the burgh"
-df.loc[df["competition_name"].str.contains("bruin"), "competition_name"] = "bruin bhangra"
-df.loc[df["competition_name"].str.contains("richmond"), "competition_name"] = "richmond mela"
-df.loc[df["competition_name"].str.contains("cup"), "competition_name"] = "6ix city bhangra"
-df.loc[df["competition_name"].str.contains("back to the"), "competition_name"] = "back to the roots"
-df.loc[df["competition_name"].str.contains("dhamak"), "competition_name"] = "dhamak bhangra"
-df.loc[df["competition_name"].str.contains("fever"), "competition_name"] = "bhangra fever"
-df.loc[df["competition_name"].str.contains("alamo"), "competition_name"] = "bhangra at the alamo"
-df.loc[df["competition_name"].str.contains("city"), "competition_name"] = "bhangra city"
-df.loc[df["competition_name"].str.contains("blowout"), "competition_name"] = "bhangra blowout"
-df.loc[df["competition_name"].str.contains("arena"), "competition_name"] = "bhangra arena"
-df.loc[df["competition_name"].str.contains("pioneer"), "competition_name"] = "pioneer bhangra"
-df.loc[df["competition_name"].str.contains("warrior"), "competition_name"] = "warrior bhangra"
-df.loc[df["competition_name"].str.contains("dcmpaa"), "competition_name"] = "dcmpaa competition"
-df.loc[df["competition_name"].str.contains("tor punjaban"), "competition_name"] = "tor punjaban"
-df.loc[df["competition_name"].str.contains("dhol di"), "competition_name"] = "dhol di awaz"
-df.loc[df["competition_name"].str.contains("elite"), "competition_name"] = "elite 8"
-df.loc[df["competition_name"].str.contains("best in the"), "competition_name"] = "bhangra idols"
-df.loc[df["competition_name"].str.contains("best of the"), "competition_name"] = "bhangra idols"
-df.loc[df["competition_name"].str.contains("idols"), "competition_name"] = "bhangra idols"
-df.loc[df["competition_name"].str.contains("bell"), "competition_name"] = "bhangra at the bell"
-df.loc[df["competition_name"].str.contains("santa"), "competition_name"] = "uc santa barbara's nachle deewane"
-df.loc[df["competition_name"].str.contains("notorious"), "competition_name"] = "notorious bhangra"
-
-
-# Ensure consistent naming conventions for teams
-df.loc[df["team_name"].str.contains("kohinoor"), "team_name"] = "kohinoor bhangra"
-df.loc[df["team_name"].str.contains("got bhangra"), "team_name"] = "got bhangra"
-df.loc[df["team_name"].str.contains("apna bhangra"), "team_name"] = "apna bhangra crew"
-df.loc[df["team_name"].str.contains("shan e"), "team_name"] = "shan e punjab"
-df.loc[df["team_name"].str.contains("punjab arts club"), "team_name"] = "punjab arts club"
-df.loc[df["team_name"].str.contains("nachdi jawani"), "team_name"] = "nachdi jawani"
-df.loc[df["team_name"].str.contains("royal academy"), "team_name"] = "royal academy "
-df.loc[df["team_name"].str.contains("mission"), "team_name"] = "mission punj-aab culture club "
-df.loc[df["team_name"].str.contains("folk stars"), "team_name"] = "folk stars "
-df.loc[df["team_name"].str.contains("punjabi heritage"), "team_name"] = "phf edmenton"
-df.loc[df["team_name"].str.contains("phf"), "team_name"] = "phf edmenton"
-df.loc[df["team_name"].str.contains("rvd"), "team_name"] = "rvd joshiley"
-df.loc[df["team_name"].str.contains("raakhe"), "team_name"] = "rvd joshiley"
-df.loc[df["team_name"].str.contains("nachde punjabi"), "team_name"] = "nachde punjabi"
-df.loc[df["team_name"].str.contains("furteelay"), "team_name"] = "furteelay"
-df.loc[df["team_name"].str.contains("bu bhangra"), "team_name"] = "bull bhangra"
-df.loc[df["team_name"].str.contains("bhams blazin", case=False), "team_name"] = "bhams blazin bhangra"
-df.loc[df["team_name"].str.contains("bhams blazin"), "team_name"] = "bhams blazin bhangra"
-df.loc[df["team_name"].str.contains("anakh"), "team_name"] = "anakh e gabroo"
-df.loc[df["team_name"].str.contains("rangla punjab arts academy"), "team_name"] = "rangla punjab arts academy"
-df.loc[df["team_name"].str.contains("royal bhangra"), "team_name"] = "royal bhangra"
-df.loc[df["team_name"].str.contains("virsa.*tradition"), "team_name"] = "virsa our tradition"
-df.loc[df["team_name"].str.contains("nachda punjab bhangra academy"), "team_name"] = "nachda punjab bhangra academy"
-df.loc[df["team_name"].str.contains("dc metro punjabi arts academy"), "team_name"] = "dc metro punjabi arts academy"
-df.loc[df["team_name"].str.contains("dcmpaa"), "team_name"] = "dc metro punjabi arts academy"
-df.loc[df["team_name"].str.contains("bhangra knight"), "team_name"] = "bhangra knightz"
-df.loc[df["team_name"].str.contains("cornell bhangra"), "team_name"] = "cornell bhangra"
-df.loc[df["team_name"].str.contains("michigan bhangra team"), "team_name"] = "michigan bhangra team"
-df.loc[df["team_name"].str.contains("the michigan bhangra team"), "team_name"] = "michigan bhangra team"
-df.loc[df["team_name"].str.contains("maryland bhangra"), "team_name"] = "maryland bhangra"
-df.loc[df["team_name"].str.contains("umd"), "team_name"] = "maryland bhangra"
-df.loc[df["team_name"].str.contains("wash u bhangra"), "team_name"] = "wash u bhangra"
-df.loc[df["team_name"].str.contains("washu bhangra"), "team_name"] = "wash u bhangra"
-df.loc[df["team_name"].str.contains("uva"), "team_name"] = "uva bhangra"
-df.loc[df["team_name"].str.contains("virginia school of bhangra"), "team_name"] = "virginia school of bhangra"
-df.loc[df["team_name"].str.contains("royal folk nation"), "team_name"] = "royal folk nation"
-df.loc[df["team_name"].str.contains("sada virsa sada gaurav"), "team_name"] = "sada virsa sada gaurav"
-df.loc[df["team_name"].str.contains("apna virsa academy"), "team_name"] = "apna virsa academy"
-df.loc[df["team_name"].str.contains("punjab folk academy"), "team_name"] = "punjab folk academy"
-df.loc[df["team_name"].str.contains("duniya allstar"), "team_name"] = "duniya allstars"
-df.loc[df["team_name"].str.contains("vsb"), "team_name"] = "virgina school of bhangra"
-df.loc[df["team_name"].str.contains("virginia school"), "team_name"] = "virgina school of bhangra"
-df.loc[df["team_name"].str.contains("naach di clevelend"), "team_name"] = "naach di cleveland"
-df.loc[df["team_name"].str.contains("naach di cleveland"), "team_name"] = "naach di cleveland"
-df.loc[df["competition_name"].str.contains("naach di clevelend"), "competition_name"] = "naach di cleveland"
-df.loc[df["competition_name"].str.contains("naach di cleveland"), "competition_name"] = "naach di cleveland"
-
-# drop tags
-mask = df["title"].str.contains("bhangra idols 10th anniversary | musical | banquet | skit | singh")
-df = df[~mask]
-
-
-# drop musical chairs + mixers
-mixers = df["title"].str.contains("mixer")
-musicalchairs = df["title"].str.contains("musical")
-df = df[~mixers]
-df = df[~musicalchairs]
+def years_stage(df):
+    ## Manual Fixes for comp_year (see comp_year_overrides.csv)
+    df = apply_comp_year_overrides(df, load_comp_year_overrides())
 
+    # check for blanks in comp year
+    df = df[df["comp_year"].notna()]
 
+    # Restrict to post 2008 data
+    discardboth = df["comp_year"].isin([2006, 2007, 2008, 2009])
+    return df[~discardboth]
 
 
-## Extract all unique list of teams 
-
-# 1. Total comps per team (denominator)
-df["total_comps"] = df.groupby("team_name")["team_name"].transform("count")
+def names_stage(df):
+    # Ensure consistent naming conventions for competitions and teams (see name_aliases.csv)
+    df = apply_aliases(df)
 
-# 2. Placing score (numerator weight)
-def comp_score(x):
-    if x == "1":
-        return 1
-    if x == "2":
-        return 0.75
-    if x == "3":
-        return 0.50
-    else:
-        return 0.10
-
-df["placing_score"] = df["placings"].apply(comp_score)
-
-
-team_scores = df.groupby("team_name")["placing_score"].sum()
-df["sum_placing_score"] = df["team_name"].map(team_scores)
-df["finalscore"] = df["sum_placing_score"] / df["total_comps"]
+    # drop tags (singh catches solo singers, not the Singh International team)
+    mask = matching(
+        df,
+        'title:"bhangra idols 10th anniversary" OR title:banquet OR title:skit'
+        ' OR (title:singh AND NOT title:"singh international")',
+    )
+    df = df[~mask]
 
+    # drop musical chairs + mixers
+    return df[~matching(df, "title:mixer* OR title:musical*")]
 
-# 1. # of teams in a competition
-df["number_of_teams_in_comp"] = df.groupby("competition_name")["team_name"].transform("count")
 
+## Categorical names, integer placings and Arrow strings (see compact.py)
+def compact_stage(df):
+    return compact_videos(df)
 
 
-# Get the sums of hte teams for the comps 
-sumforcomps = df.groupby("competition_name")["finalscore"].sum()
-df["comp_numerator"] = df["competition_name"].map(sumforcomps)
-df["comp_score"] = df["comp_numerator"] / df["number_of_teams_in_comp"]
-df["team_score"] = df["avg_score"] * np.log1p(df["total_comps"])
+## Score teams by their average placing, and competitions by the strength
+## of their field (see scoring.py for the formulas)
+def team_scores_stage(df):
+    return team_scores(df, PLACING_WEIGHTS)
 
 
-df = df.sort_values("comp_score", ascending=False)
+def comp_scores_stage(df, teams):
+    return competition_scores(df, teams)
 
 
+## Per-season scores plus a 3-season rolling window, indexed by (team_name, comp_year).
+## The per-season table is kept on disk and only seasons whose videos changed
+## are recomputed; the rolling window is cheap to redo from it.
+YEARLY_TABLE_PATH = "team_yearly_scores.csv"
 
 
+def rankings_stage(df, path=YEARLY_TABLE_PATH):
+    yearly = refresh_yearly_table(read_yearly_table(path), df, PLACING_WEIGHTS)
+    yearly.to_csv(path)
+    yearly = yearly.drop(columns="year_digest")
+    return yearly.join(rolling_team_table(yearly, window=3))
 
-print(df["placings"].info())
 
+## The Elo ladder keeps its own history so new seasons only play their own
+## events. It records the alias table it was played under and replays
+## everything by itself when name_aliases.csv changes.
+ELO_HISTORY_PATH = "team_elo_history.csv"
 
 
+def update_elo_history(df, path=ELO_HISTORY_PATH):
+    names_key = file_digest(name_aliases.ALIASES_PATH, inspect.getsource(name_aliases))
+    history = update_elo(read_elo_history(path), df, names_key=names_key)
+    history.to_csv(path, index=False)
+    return history
 
-df.to_csv("filtered_GTVVideos.csv", index=False)
 
+## Label every video in the export as competition/exhibition/mixer/other.
+## The model learns from the curated exclusions, the keyword filters and the
+## videos that survive cleaning; it is only retrained when the exclusions or
+## classifier change, so a sync only scores its new uploads.
+def classify_stage(df):
+    videos = load_videos(link, columns=FEATURE_COLUMNS)
+    labels = pd.Series(None, index=videos.index, dtype=object)
+    labels[videos["video_id"].isin(df["video_id"])] = "competition"
+    labels[matching(videos, "title:exhibition* OR description:exhibition*")] = "exhibition"
+    labels[matching(videos, "title:mixer* OR title:musical*")] = "mixer"
+    curated = videos["video_id"].map({k: reason_label(r) for k, r in load_exclusions().items()})
+    labels[curated.notna()] = curated[curated.notna()]
 
+    ## The model is keyed on the labeling rules above as well as the classifier
+    key = file_digest(
+        curation.EXCLUSIONS_PATH, inspect.getsource(classifier) + inspect.getsource(classify_stage)
+    )
+    return classify(videos, labels, key)
+
+
+## Each stage is memoized on disk; only stages downstream of a changed input,
+## config file or function rerun, and row-wise stages only see new rows.
+## Stages that call matching() also depend on how the index is built (from load_videos)
+INDEX_CODE = [matching, text_index, loading]
+
+STAGES = [
+    Stage("load", load_stage, configs=[link], code=[loading, durations, *INDEX_CODE]),
+    Stage("curate", curate_stage, ["load"], configs=[curation.EXCLUSIONS_PATH], code=[curation]),
+    Stage("filter", filter_stage, ["curate"], code=INDEX_CODE, row_wise=True),
+    Stage("titles", titles_stage, ["filter"], code=[title_parsing], row_wise=True),
+    Stage("years", years_stage, ["titles"], configs=[curation.OVERRIDES_PATH], code=[curation]),
+    Stage(
+        "names",
+        names_stage,
+        ["years"],
+        configs=[name_aliases.ALIASES_PATH],
+        code=[name_aliases, *INDEX_CODE],
+        row_wise=True,
+    ),
+    Stage("compact", compact_stage, ["names"], code=[compact, scoring, columnar_cache]),
+    Stage("team_scores", team_scores_stage, ["compact"], code=[scoring]),
+    Stage("comp_scores", comp_scores_stage, ["compact", "team_scores"], code=[scoring]),
+    Stage("rankings", rankings_stage, ["compact"], code=[scoring, rankings]),
+    Stage(
+        "classify",
+        classify_stage,
+        ["compact"],
+        configs=[link, curation.EXCLUSIONS_PATH],
+        code=[classifier, durations, *INDEX_CODE],
+    ),
+]
+
+
+def main():
+    ## GTV_PROCESSES=8 runs the row-wise stages on chunks in 8 processes
+    ## (worth it for merged multi-channel exports; results are identical)
+    outputs = run_pipeline(STAGES, processes=int(os.environ.get("GTV_PROCESSES", "1")))
+    df = outputs["compact"]
+    teams = outputs["team_scores"]
+    comps = outputs["comp_scores"]
+    with metrics.stage("elo", rows_in=len(df)):
+        rankings_table = outputs["rankings"].join(elo_table(update_elo_history(df)))
+
+    # Strongest competitions first
+    comp_score = df["competition_name"].map(comps["comp_score"]).to_numpy(dtype=float)
+    df = df.iloc[np.argsort(-comp_score, kind="stable")]
+
+    print(df["placings"].info())
+    print(teams.head(20))
+
+    with metrics.stage("write", rows_in=len(df)):
+        df.to_csv("filtered_GTVVideos.csv", index=False)
+        write_parquet(df, "filtered_GTVVideos.parquet")
+        teams.to_csv("team_scores.csv")
+        comps.to_csv("competition_scores.csv")
+        rankings_table.to_csv("team_rankings.csv")
+
+    ## Kept videos the classifier doesn't think are competitions, for review
+    classes = outputs["classify"].set_index("video_id")
+    flagged = df[df["video_id"].map(classes["label"]) != "competition"]
+    print(f"{len(flagged)} kept videos classified as non-competition")
+    print(flagged[["video_id", "title"]].assign(label=flagged["video_id"].map(classes["label"])).head(20))
+
+    ## Near-duplicate names that name_aliases.csv doesn't catch yet, for review
+    with metrics.stage("name_dedup", rows_in=len(df)) as record:
+        suggestions = suggest_aliases(df)
+        record["rows_out"] = len(suggestions)
+    write_suggestions(suggestions)
+
+
+## Set GTV_RUN_REPORT=run_report.json (and optionally GTV_PROFILE=slowest.prof,
+## GTV_TRACE_MEMORY=1) to record per-stage metrics; see metrics.py
+if __name__ == "__main__":
+    with metrics.recording_from_env():
+        main()
@@ -0,0 +1,142 @@
+"""Typed, column-pruned loading of crawl exports (gabroo_videos_full.csv).
+
+pd.read_csv with defaults reads every column as object/float64. load_videos
+reads only the requested columns with explicit dtypes, can read in chunks
+and drop rows early (short videos, excluded title keywords) before they are
+ever concatenated, and can use PyArrow's multithreaded CSV reader when it
+is installed. When pyarrow is available the typed frame is also kept in a
+content-hashed Parquet cache (see columnar_cache), so an unchanged export
+is only parsed once.
+"""
+import os
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+import columnar_cache
+from durations import parse_duration_series
+
+# Column types for GTVAPICALL.FIELDNAMES. Counts are nullable because a
+# video can hide its likes or have comments disabled. duration is kept as
+# text because it is an ISO 8601 string unless crawled with
+# --duration-seconds.
+VIDEO_DTYPES: Dict[str, str] = {
+    "video_id": "object",
+    "title": "object",
+    "published_at": "object",
+    "year": "Int16",
+    "duration": "object",
+    "view_count": "Int64",
+    "like_count": "Int64",
+    "comment_count": "Int64",
+    "channel_title": "category",
+    "category_id": "category",
+    "tags": "object",
+    "description": "object",
+}
+
+# Part of the cache key, so changing a dtype invalidates cached exports
+SCHEMA_KEY = repr(sorted(VIDEO_DTYPES.items()))
+
+# What the cleaning pipeline reads and writes back out; tags are not used
+ANALYSIS_COLUMNS: List[str] = [c for c in VIDEO_DTYPES if c != "tags"]
+
+
+def _read_pyarrow(path: str, columns: List[str]) -> pd.DataFrame:
+    # pandas' engine="pyarrow" can't handle the newlines inside quoted
+    # descriptions, so call pyarrow.csv directly
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    arrow_types = {"Int16": pa.int16(), "Int64": pa.int64()}
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={c: arrow_types.get(VIDEO_DTYPES[c], pa.string()) for c in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().astype({c: VIDEO_DTYPES[c] for c in columns})
+
+
+def filter_videos(
+    df: pd.DataFrame,
+    min_duration: Optional[float] = None,
+    exclude_title_keywords: Iterable[str] = (),
+) -> pd.DataFrame:
+    """Drop rows at or under min_duration seconds or whose title has a keyword.
+
+    If min_duration is given, duration is converted to float seconds first.
+    """
+    keep = pd.Series(True, index=df.index)
+    if min_duration is not None:
+        df["duration"] = parse_duration_series(df["duration"])
+        keep &= df["duration"] > min_duration
+    for keyword in exclude_title_keywords:
+        keep &= ~df["title"].str.contains(keyword, case=False, na=False, regex=False)
+    return df[keep]
+
+
+def build_cache(path: str) -> Optional[str]:
+    """Parse path into the Parquet cache unless it is already there.
+
+    Returns the cache file, or None when pyarrow is not installed.
+    """
+    if not columnar_cache.have_pyarrow():
+        return None
+    target = columnar_cache.cache_path(path, SCHEMA_KEY)
+    if not os.path.exists(target):
+        df = pd.read_csv(path, usecols=list(VIDEO_DTYPES), dtype=VIDEO_DTYPES)
+        columnar_cache.write_cached(df, target)
+    return target
+
+
+def load_videos(
+    path: str,
+    columns: Optional[List[str]] = None,
+    chunksize: Optional[int] = None,
+    engine: Optional[str] = None,
+    min_duration: Optional[float] = None,
+    exclude_title_keywords: Iterable[str] = (),
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """Load a crawl export with VIDEO_DTYPES, optionally filtering as it reads.
+
+    columns defaults to every column. With use_cache (and pyarrow
+    installed) the typed frame comes from the Parquet cache, built on the
+    first load of each version of the file, and only `columns` are read
+    from it. Otherwise: with chunksize, the file is read and filtered chunk
+    by chunk so dropped rows never accumulate in memory; engine="pyarrow"
+    uses pyarrow.csv and reads the whole file at once.
+    """
+    columns = columns or list(VIDEO_DTYPES)
+    keywords = list(exclude_title_keywords)
+    if use_cache and not chunksize:
+        cached = build_cache(path)
+        if cached:
+            df = columnar_cache.read_cached(cached, columns)
+            return filter_videos(df, min_duration, keywords)
+
+    if engine == "pyarrow":
+        if chunksize:
+            raise ValueError("chunksize is not supported with engine='pyarrow'")
+        df = _read_pyarrow(path, columns)
+        return filter_videos(df, min_duration, keywords)
+
+    dtypes = {c: VIDEO_DTYPES[c] for c in columns}
+    if not chunksize:
+        df = pd.read_csv(path, usecols=columns, dtype=dtypes)
+        return filter_videos(df, min_duration, keywords)
+
+    chunks = [
+        filter_videos(chunk, min_duration, keywords)
+        for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+    ]
+    # Categories differ per chunk; union them so the concat stays categorical
+    df = pd.concat(chunks)
+    for c in columns:
+        if dtypes[c] == "category":
+            df[c] = df[c].astype("category")
+    return df
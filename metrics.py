@@ -0,0 +1,201 @@
+"""Opt-in run metrics for the crawler and the cleaning pipeline.
+
+Nothing is recorded unless a run is wrapped in recording(). Inside it:
+
+  stage(name, rows_in)  times a block and records rows in/out, API calls
+                        and quota units spent while it was open, and the
+                        process's memory high-water mark when it closed
+  timed(name)           adds a block's wall time to a named running total
+                        (playlist pages, detail batches, CSV writes), for
+                        work that is interleaved rather than sequential
+  api_call(units)       counts one API request; execute_with_backoff calls it
+
+When recording() exits it writes a JSON run report. With trace_memory it
+also records each stage's peak traced allocation, which costs speed.
+With profile_path, every top-level stage runs under cProfile and the stats
+of the slowest one are dumped there; open them with pstats, snakeviz or
+flameprof. Only the calling thread is profiled, so crawl worker threads
+show up as time waiting on futures. GTV_RUN_REPORT, GTV_PROFILE and GTV_TRACE_MEMORY=1 switch this
+on for scripts without a command line (see recording_from_env).
+"""
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def _rss_peak_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class Recorder:
+    def __init__(self, profile_path: Optional[str] = None, trace_memory: bool = False):
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.started = time.time()
+        self.stages: List[Dict] = []
+        self.timers: Dict[str, Dict[str, float]] = {}
+        self.api_calls = 0
+        self.quota_units = 0
+        self._open: List[Dict] = []
+        self._lock = threading.Lock()
+        self._slowest: Optional[cProfile.Profile] = None
+        self._slowest_seconds = -1.0
+        self._slowest_stage = ""
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[Dict]:
+        record = {
+            "stage": f"{self._open[-1]['stage']}.{name}" if self._open else name,
+            "rows_in": rows_in,
+            "rows_out": None,
+            "api_calls": 0,
+            "quota_units": 0,
+        }
+        profiler = cProfile.Profile() if self.profile_path and not self._open else None
+        if self.trace_memory:
+            self._fold_traced_peak()
+            record["traced_peak_mb"] = 0.0
+        with self._lock:
+            self._open.append(record)
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record["seconds"] = round(time.perf_counter() - start, 6)
+            record["rss_peak_mb"] = round(_rss_peak_mb(), 1)
+            if self.trace_memory:
+                self._fold_traced_peak()
+            with self._lock:
+                self._open.pop()
+                if self.trace_memory and self._open:
+                    parent = self._open[-1]
+                    parent["traced_peak_mb"] = max(parent["traced_peak_mb"], record["traced_peak_mb"])
+            if self.trace_memory:
+                record["traced_peak_mb"] = round(record["traced_peak_mb"], 1)
+            self.stages.append(record)
+            if profiler and record["seconds"] > self._slowest_seconds:
+                self._slowest, self._slowest_seconds = profiler, record["seconds"]
+                self._slowest_stage = record["stage"]
+
+    def _fold_traced_peak(self) -> None:
+        """Credit the traced peak since the last reset to the innermost open stage."""
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.reset_peak()
+        if self._open:
+            current = self._open[-1]
+            current["traced_peak_mb"] = max(current["traced_peak_mb"], peak)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timer = self.timers.setdefault(name, {"count": 0, "seconds": 0.0})
+                timer["count"] += 1
+                timer["seconds"] += elapsed
+
+    def api_call(self, units: int) -> None:
+        with self._lock:
+            self.api_calls += 1
+            self.quota_units += units
+            for record in self._open:
+                record["api_calls"] += 1
+                record["quota_units"] += units
+
+    def report(self) -> Dict:
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "seconds": round(time.time() - self.started, 3),
+            "argv": sys.argv,
+            "api_calls": self.api_calls,
+            "quota_units": self.quota_units,
+            "rss_peak_mb": round(_rss_peak_mb(), 1),
+            "stages": self.stages,
+            "timers": {k: {**v, "seconds": round(v["seconds"], 6)} for k, v in self.timers.items()},
+        }
+        if self._slowest is not None:
+            report["profile"] = {"stage": self._slowest_stage, "path": self.profile_path}
+        return report
+
+    def write(self, path: Optional[str]) -> None:
+        if self._slowest is not None:
+            self._slowest.dump_stats(self.profile_path)
+            print(f"Profile of slowest stage ({self._slowest_stage}) written to {self.profile_path}")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+            print(f"Run report written to {path}")
+
+
+_active: Optional[Recorder] = None
+
+
+@contextmanager
+def recording(
+    report_path: Optional[str] = None,
+    profile_path: Optional[str] = None,
+    trace_memory: bool = False,
+) -> Iterator[Optional[Recorder]]:
+    """Record metrics for the enclosed run; a no-op if both paths are None."""
+    global _active
+    if not report_path and not profile_path:
+        yield None
+        return
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = Recorder(profile_path, trace_memory)
+    try:
+        yield _active
+    finally:
+        recorder, _active = _active, None
+        if started_tracing:
+            tracemalloc.stop()
+        recorder.write(report_path)
+
+
+def recording_from_env():
+    return recording(
+        os.environ.get("GTV_RUN_REPORT"),
+        os.environ.get("GTV_PROFILE"),
+        os.environ.get("GTV_TRACE_MEMORY") == "1",
+    )
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None) -> Iterator[Dict]:
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows_in) as record:
+        yield record
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    if _active is None:
+        yield
+        return
+    with _active.timed(name):
+        yield
+
+
+def api_call(units: int) -> None:
+    if _active is not None:
+        _active.api_call(units)
@@ -0,0 +1,59 @@
+"""Team and competition name normalization driven by name_aliases.csv.
+
+Each row of the alias table maps a regex `pattern` found anywhere in a
+`column` value to its `canonical` name. When several patterns match the same
+value, the rule with the highest `priority` wins, and ties go to the rule
+listed first. A column's rules are compiled into one regex that is run once
+per unique value, and the result is mapped back onto the column, so adding
+aliases costs almost nothing per row.
+"""
+import csv
+import os
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_aliases.csv")
+
+# (pattern, canonical) pairs in the order they are tried
+Rules = List[Tuple[str, str]]
+
+
+def load_alias_rules(path: str = ALIASES_PATH) -> Dict[str, Rules]:
+    """Read the alias table into per-column rule lists, highest priority first."""
+    ranked: Dict[str, List[Tuple[int, int, str, str]]] = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            priority = int(row.get("priority") or 0)
+            ranked.setdefault(row["column"], []).append(
+                (-priority, i, row["pattern"], row["canonical"])
+            )
+    return {col: [(pat, canon) for _, _, pat, canon in sorted(rows)] for col, rows in ranked.items()}
+
+
+def compile_rules(rules: Rules) -> re.Pattern:
+    """Combine rules into one anchored regex whose lastgroup names the winner.
+
+    Each rule becomes a lookahead alternative at the start of the string, so
+    the first rule (in priority order) that matches anywhere in the value is
+    the one selected.
+    """
+    alternatives = [f"(?=.*?(?:{pattern}))(?P<r{i}>)" for i, (pattern, _) in enumerate(rules)]
+    return re.compile("^(?:" + "|".join(alternatives) + ")", re.DOTALL)
+
+
+def normalize_names(names: pd.Series, rules: Rules) -> pd.Series:
+    matcher = compile_rules(rules)
+    mapping = {}
+    for value in names.dropna().unique():
+        match = matcher.match(value)
+        mapping[value] = rules[int(match.lastgroup[1:])][1] if match else value
+    return names.map(mapping)
+
+
+def apply_aliases(df: pd.DataFrame, path: str = ALIASES_PATH) -> pd.DataFrame:
+    """Normalize every column that has rules in the alias table."""
+    for column, rules in load_alias_rules(path).items():
+        df[column] = normalize_names(df[column], rules)
+    return df
@@ -0,0 +1,126 @@
+"""Suggest alias rules for near-duplicate team and competition names.
+
+Names are compared on their lowercase letters and digits only, so spacing
+and punctuation variants ("wash u" / "washu") collapse straight away.
+Everything else is found by blocking: each name is indexed by its character
+trigrams and only names that share at least `min_shared` trigrams are ever
+compared. Trigrams shared by more than `max_block` names (the "bha", "ngr"
+of bhangra) are skipped, since they say nothing about which team it is.
+Candidates scoring at least `threshold` with difflib are clustered, and
+every variant gets a rule pointing at the most common spelling. The rules
+use the name_aliases.csv layout so they can be reviewed and pasted in.
+"""
+import csv
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import pandas as pd
+
+SUGGESTIONS_PATH = "suggested_aliases.csv"
+FIELDNAMES = ["column", "pattern", "canonical", "priority", "similarity"]
+
+
+def compact(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"#{text}#"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def candidate_pairs(
+    keys: Sequence[str], min_shared: int = 2, max_block: int = 50
+) -> Iterable[Tuple[int, int]]:
+    """Index pairs of keys that share at least min_shared informative trigrams."""
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        for gram in trigrams(key):
+            blocks[gram].append(i)
+    shared: Counter = Counter()
+    for members in blocks.values():
+        if len(members) > max_block:
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                shared[members[a], members[b]] += 1
+    return (pair for pair, count in shared.items() if count >= min_shared)
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_names(
+    names: pd.Series,
+    threshold: float = 0.88,
+    min_shared: int = 2,
+    max_block: int = 50,
+) -> List[List[Tuple[str, int, float]]]:
+    """Clusters of (name, count, similarity to the canonical) with two or more spellings.
+
+    The canonical spelling (the most common one) comes first in each cluster.
+    """
+    # Most common first, ties alphabetical, whatever the dtype of names
+    counts = names.dropna().astype(object).value_counts()
+    counts = counts.sort_index().sort_values(ascending=False, kind="stable")
+    values = list(counts.index)
+    keys = [compact(value) for value in values]
+
+    # Unique compact keys are what gets compared; spelling variants of one key
+    # are already duplicates
+    key_ids: Dict[str, int] = {}
+    for key in keys:
+        key_ids.setdefault(key, len(key_ids))
+    unique_keys = list(key_ids)
+    parent = list(range(len(unique_keys)))
+    for a, b in candidate_pairs(unique_keys, min_shared, max_block):
+        if SequenceMatcher(None, unique_keys[a], unique_keys[b]).ratio() >= threshold:
+            parent[_find(parent, a)] = _find(parent, b)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        groups[_find(parent, key_ids[key])].append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        # value_counts order puts the most common spelling first
+        canonical = keys[members[0]]
+        clusters.append(
+            [
+                (values[i], int(counts.iloc[i]), SequenceMatcher(None, canonical, keys[i]).ratio())
+                for i in members
+            ]
+        )
+    return clusters
+
+
+def suggest_aliases(df: pd.DataFrame, columns: Sequence[str] = ("team_name", "competition_name"), **kwargs) -> pd.DataFrame:
+    """Alias rules mapping each variant spelling onto its cluster's canonical name."""
+    rows = []
+    for column in columns:
+        for cluster in cluster_names(df[column], **kwargs):
+            canonical = cluster[0][0]
+            for name, _, similarity in cluster[1:]:
+                rows.append(
+                    {
+                        "column": column,
+                        "pattern": "^" + re.escape(name) + "$",
+                        "canonical": canonical,
+                        "priority": 0,
+                        "similarity": round(similarity, 3),
+                    }
+                )
+    return pd.DataFrame(rows, columns=FIELDNAMES)
+
+
+def write_suggestions(suggestions: pd.DataFrame, path: str = SUGGESTIONS_PATH) -> None:
+    suggestions.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL)
+    print(f"Wrote {len(suggestions)} suggested aliases to {path}")
@@ -0,0 +1,227 @@
+"""Named, memoized pipeline stages for the cleaning workflow.
+
+Each Stage declares the stages it reads from, the config/data files it
+depends on, and any modules whose code it calls. A stage's output is saved
+under .columnar_cache/stages/, keyed by a hash of its code, its config
+file contents and the contents of its input frames. On the next run it
+recomputes only if one of those changed, so editing an alias only reruns
+the stages from normalization onwards.
+
+Stages marked row_wise map each input row independently (filter, parse,
+normalize). They also remember which input rows they have already
+processed, so when a crawl adds videos only the new rows are run through
+the stage and the rest are reused.
+
+With processes > 1, row-wise stages split the rows they run on into
+chunks and map them over a process pool. The chunks are concatenated back
+in order before any later stage sees them, so group-level stages (scoring,
+rankings) get exactly the frame the single-process run would give them.
+Inputs smaller than two chunks of min_chunk_rows run in-process, since
+pickling them would cost more than it saves.
+
+Memoization needs pyarrow for Parquet. Without it every stage simply runs.
+"""
+import hashlib
+import inspect
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+import compact
+import metrics
+
+CACHE_DIR = os.path.join(columnar_cache.CACHE_DIR_NAME, "stages")
+ROW_HASH = "_row_hash"
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., pd.DataFrame]
+    inputs: List[str] = field(default_factory=list)
+    configs: List[str] = field(default_factory=list)
+    code: List[object] = field(default_factory=list)
+    row_wise: bool = False
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    digest = hashlib.sha256(repr(list(zip(df.columns, map(str, df.dtypes)))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def code_digest(stage: Stage) -> str:
+    """Hash the stage's code and config files (but not its inputs)."""
+    digest = hashlib.sha256(stage.name.encode("utf-8"))
+    for obj in [stage.func] + stage.code:
+        digest.update(inspect.getsource(obj).encode("utf-8"))
+    for path in stage.configs:
+        digest.update(columnar_cache.file_digest(path).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    # Content only: a crawl that prepends new videos shifts every index
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _read(path: str) -> Optional[pd.DataFrame]:
+    return columnar_cache.read_cached(path)
+
+
+def _write(df: pd.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columnar_cache.write_parquet(df, path, index=True)
+
+
+def _prune(cache_dir: str, stage_name: str, keep: List[str]) -> None:
+    """Remove memo files of earlier versions of a stage."""
+    if not os.path.isdir(cache_dir):
+        return
+    keep_names = {os.path.basename(path) for path in keep}
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(stage_name + ".") and entry not in keep_names:
+            os.remove(os.path.join(cache_dir, entry))
+
+
+def _map_chunks(
+    func: Callable[[pd.DataFrame], pd.DataFrame],
+    df: pd.DataFrame,
+    pool: Optional[Executor],
+    processes: int,
+    min_chunk_rows: int,
+) -> pd.DataFrame:
+    """func(df), computed chunk by chunk on pool when df is big enough."""
+    if pool is None or len(df) < 2 * min_chunk_rows:
+        return func(df.copy())
+    n_chunks = min(processes * 4, len(df) // min_chunk_rows)
+    bounds = np.linspace(0, len(df), n_chunks + 1).astype(int)
+    chunks = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    return pd.concat(list(pool.map(func, chunks)))
+
+
+def _run_row_wise(
+    stage: Stage,
+    df: pd.DataFrame,
+    out_path: str,
+    seen_path: str,
+    run: Callable[[pd.DataFrame], pd.DataFrame],
+) -> pd.DataFrame:
+    """Run a row-wise stage on the input rows it has not processed before.
+
+    The memo holds the previous output (tagged with the hash of the input
+    row each output row came from) and the hashes of every input row seen,
+    including those the stage dropped. Both are pruned to the current input.
+    """
+    hashes = row_hashes(df)
+    previous = _read(out_path)
+    seen = _read(seen_path)
+
+    if previous is None or seen is None or not pd.Index(hashes).is_unique:
+        new_rows = np.ones(len(df), dtype=bool)
+        reused = None
+    else:
+        new_rows = ~np.isin(hashes, seen[ROW_HASH].to_numpy())
+        reused = previous[previous[ROW_HASH].isin(hashes[~new_rows])]
+        print(f"  {new_rows.sum()} new rows, {len(df) - new_rows.sum()} reused")
+
+    fresh = run(df[new_rows])
+    fresh[ROW_HASH] = pd.Series(hashes, index=df.index).loc[fresh.index].to_numpy()
+    if reused is None:
+        combined = fresh
+    else:
+        # Reused rows take the index their input row has now
+        reused = reused.set_axis(pd.Index(df.index)[_positions(hashes, reused[ROW_HASH])])
+        combined = pd.concat([reused, fresh])
+    combined = combined.iloc[np.argsort(_positions(hashes, combined[ROW_HASH]), kind="stable")]
+
+    _write(combined, out_path)
+    _write(pd.DataFrame({ROW_HASH: hashes}), seen_path)
+    return combined.drop(columns=ROW_HASH)
+
+
+def _positions(hashes: np.ndarray, wanted: pd.Series) -> np.ndarray:
+    """Positions in hashes (the current input) of each hash in wanted."""
+    return pd.Index(hashes).get_indexer(wanted.to_numpy())
+
+
+def run_pipeline(
+    stages: List[Stage],
+    cache_dir: str = CACHE_DIR,
+    use_cache: bool = True,
+    processes: int = 1,
+    min_chunk_rows: int = 10_000,
+) -> Dict[str, pd.DataFrame]:
+    """Run stages in order (inputs must come earlier) and return every output.
+
+    processes > 1 runs row-wise stages on chunks of at least min_chunk_rows
+    rows in that many worker processes; the outputs are identical.
+    """
+    pool = ProcessPoolExecutor(processes) if processes > 1 else None
+    try:
+        return _run_stages(stages, cache_dir, use_cache, pool, processes, min_chunk_rows)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _run_stages(
+    stages: List[Stage],
+    cache_dir: str,
+    use_cache: bool,
+    pool: Optional[Executor],
+    processes: int,
+    min_chunk_rows: int,
+) -> Dict[str, pd.DataFrame]:
+    use_cache = use_cache and columnar_cache.have_pyarrow()
+    outputs: Dict[str, pd.DataFrame] = {}
+    digests: Dict[str, str] = {}
+    for stage in stages:
+        # Stages may modify their input in place, so hand them copies
+        inputs = [outputs[name].copy() for name in stage.inputs]
+        code_key = code_digest(stage)
+        key = hashlib.sha256(
+            (code_key + "".join(digests[name] for name in stage.inputs)).encode("utf-8")
+        ).hexdigest()[:16]
+        path = os.path.join(cache_dir, f"{stage.name}.{key}.parquet")
+        keep = [path]
+
+        with metrics.stage(stage.name, rows_in=sum(len(i) for i in inputs)) as record:
+            df = _read(path) if use_cache else None
+            record["cached"] = df is not None
+            if df is not None:
+                print(f"{stage.name}: cached")
+            elif use_cache and stage.row_wise and len(inputs) == 1:
+                print(f"{stage.name}: running")
+                keep += [
+                    os.path.join(cache_dir, f"{stage.name}.{code_key}.rows.parquet"),
+                    os.path.join(cache_dir, f"{stage.name}.{code_key}.seen.parquet"),
+                ]
+                df = _run_row_wise(
+                    stage,
+                    inputs[0],
+                    keep[1],
+                    keep[2],
+                    lambda rows: _map_chunks(stage.func, rows, pool, processes, min_chunk_rows),
+                )
+            elif stage.row_wise and len(inputs) == 1:
+                print(f"{stage.name}: running")
+                df = _map_chunks(stage.func, inputs[0], pool, processes, min_chunk_rows)
+            else:
+                print(f"{stage.name}: running")
+                df = stage.func(*inputs)
+
+            if use_cache and not os.path.exists(path):
+                _write(df, path)
+                _prune(cache_dir, stage.name, keep)
+            record["rows_out"] = len(df)
+            record["frame_mb"] = round(compact.frame_mb(df), 3)
+            print(f"  {len(df)} rows, {record['frame_mb']:.2f} MB")
+        outputs[stage.name] = df
+        digests[stage.name] = frame_digest(df)
+    return outputs
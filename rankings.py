@@ -0,0 +1,319 @@
+"""Per-year, rolling-window and Elo rankings of teams.
+
+All tables are indexed by (team_name, comp_year) and sorted, so
+table.loc["kohinoor bhangra"] gives a team's history and
+year_ranking(table, 2019) gives one season's ladder.
+
+The Elo ladder treats each (competition_name, comp_year) as an event in
+which every entrant plays every other: first beats second beats third
+beats the unplaced teams, and unplaced teams draw with each other. Events
+are processed in order of their first upload. The ladder's whole state is
+its long-format history. update_elo replays only from the earliest event
+whose entrants or placings differ from the history, so a new season plays
+only its own events, and a late or excluded video replays only from its
+event onwards.
+"""
+import os
+import sys
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from scoring import PLACING_WEIGHTS, placing_codes
+
+INDEX = ["team_name", "comp_year"]
+ELO_START = 1500.0
+ELO_K = 32.0
+EVENT = ["competition_name", "comp_year"]
+ENTRY_COLUMNS = ["event_date", "competition_name", "comp_year", "team_name", "placing"]
+HISTORY_COLUMNS = ENTRY_COLUMNS + ["rating", "names_key"]
+
+
+def yearly_team_table(df: pd.DataFrame, weights: Sequence[float] = PLACING_WEIGHTS) -> pd.DataFrame:
+    """total_comps, sum_placing_score and finalscore per team per comp_year."""
+    scores = pd.Series(np.asarray(weights, dtype=float)[placing_codes(df["placings"])], index=df.index)
+    grouped = scores.groupby([df["team_name"], df["comp_year"]], observed=True).agg(["size", "sum"])
+    grouped.columns = ["total_comps", "sum_placing_score"]
+    grouped.index.names = INDEX
+    grouped["finalscore"] = grouped["sum_placing_score"] / grouped["total_comps"]
+    return grouped.sort_index()
+
+
+def update_yearly_table(
+    table: pd.DataFrame,
+    df: pd.DataFrame,
+    years: Optional[Iterable[int]] = None,
+    weights: Sequence[float] = PLACING_WEIGHTS,
+) -> pd.DataFrame:
+    """Recompute only `years` (default: years in df missing from table)."""
+    known = set(table.index.get_level_values("comp_year"))
+    years = set(df["comp_year"].dropna()) - known if years is None else set(years)
+    if not years:
+        return table
+    fresh = yearly_team_table(df[df["comp_year"].isin(years)], weights)
+    kept = table[~table.index.get_level_values("comp_year").isin(years)]
+    return pd.concat([kept, fresh]).sort_index()
+
+
+def year_digests(df: pd.DataFrame, weights: Sequence[float] = PLACING_WEIGHTS) -> pd.Series:
+    """A digest per comp_year of the rows its yearly table is computed from."""
+    rows = pd.DataFrame(
+        {
+            "team_name": df["team_name"].astype(str),
+            "comp_year": df["comp_year"].astype(int),
+            "placing": placing_codes(df["placings"]),
+        }
+    )
+    hashes = pd.util.hash_pandas_object(rows, index=False)
+    # Summing makes the digest independent of row order
+    sums = hashes.groupby(rows["comp_year"].to_numpy()).sum()
+    salt = int(pd.util.hash_pandas_object(pd.Series(np.asarray(weights, dtype=float))).sum())
+    return sums.map(lambda total: format((int(total) + salt) % 2**64, "016x")).rename_axis("comp_year")
+
+
+def refresh_yearly_table(
+    table: Optional[pd.DataFrame],
+    df: pd.DataFrame,
+    weights: Sequence[float] = PLACING_WEIGHTS,
+) -> pd.DataFrame:
+    """Bring a saved yearly table (or None) up to date with df.
+
+    The table carries a year_digest column (see year_digests). Only years
+    whose rows changed, or that are new, are recomputed; years no longer
+    in df are dropped.
+    """
+    digests = year_digests(df, weights)
+    if table is None or table.empty:
+        table = yearly_team_table(df.iloc[:0], weights).assign(year_digest="")
+    saved = table.groupby(level="comp_year")["year_digest"].first()
+    changed = digests.index[digests.ne(saved.reindex(digests.index))]
+    table = table[table.index.get_level_values("comp_year").isin(digests.index)]
+    table = update_yearly_table(table, df, changed, weights)
+    print(f"Recomputed {len(changed)} of {len(digests)} seasons")
+    return table.assign(year_digest=digests.reindex(table.index.get_level_values("comp_year")).to_numpy())
+
+
+def read_yearly_table(path: str) -> Optional[pd.DataFrame]:
+    """The table refresh_yearly_table saved at path, or None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    table = pd.read_csv(
+        path,
+        dtype={"team_name": str, "year_digest": str},
+        keep_default_na=False,
+        float_precision="round_trip",
+    )
+    return table.set_index(INDEX)
+
+
+def rolling_team_table(yearly: pd.DataFrame, window: int = 3) -> pd.DataFrame:
+    """Scores over the `window` seasons ending at each year a team competed.
+
+    Seasons a team skipped count as empty, so a window is always
+    `window` calendar years wide.
+    """
+    years = yearly.index.get_level_values("comp_year").astype(int)
+    teams = yearly.index.get_level_values("team_name")
+    full_years = np.arange(years.min(), years.max() + 1)
+    grid = pd.MultiIndex.from_product([teams.unique(), full_years], names=INDEX)
+    sums = (
+        yearly[["total_comps", "sum_placing_score"]]
+        .set_axis(pd.MultiIndex.from_arrays([teams, years], names=INDEX))
+        .reindex(grid, fill_value=0)
+        .groupby(level="team_name", observed=True)
+        .rolling(window, min_periods=1)
+        .sum()
+        .droplevel(0)
+    )
+    sums = sums.loc[pd.MultiIndex.from_arrays([teams, years])]
+    out = pd.DataFrame(
+        {
+            "window_comps": sums["total_comps"].to_numpy(),
+            "window_score": (sums["sum_placing_score"] / sums["total_comps"]).to_numpy(),
+        },
+        index=yearly.index,
+    )
+    return out
+
+
+def year_ranking(table: pd.DataFrame, year: int, by: str = "finalscore") -> pd.DataFrame:
+    """One season's teams, best first."""
+    return table.xs(year, level="comp_year").sort_values(by, ascending=False)
+
+
+def _play_event(ratings: np.ndarray, placing: np.ndarray, k: float) -> np.ndarray:
+    """Return new ratings after one round-robin event (placing 0 = unplaced)."""
+    n = len(ratings)
+    if n < 2:
+        return ratings
+    rank = np.where(placing == 0, 4, placing)
+    actual = (rank[:, None] < rank[None, :]) + 0.5 * (rank[:, None] == rank[None, :])
+    expected = 1 / (1 + 10 ** ((ratings[None, :] - ratings[:, None]) / 400))
+    np.fill_diagonal(actual, 0)
+    np.fill_diagonal(expected, 0)
+    return ratings + k * (actual - expected).sum(axis=1) / (n - 1)
+
+
+def _entries(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per team per event: its best placing and the event's first upload."""
+    entries = pd.DataFrame(
+        {
+            "event_date": df["published_at"].astype(str),
+            "competition_name": df["competition_name"].astype(object),
+            "comp_year": df["comp_year"].astype(int),
+            "team_name": df["team_name"].astype(object),
+            "placing": placing_codes(df["placings"]),
+        }
+    )
+    return _best_entries(entries)
+
+
+def _best_entries(entries: pd.DataFrame) -> pd.DataFrame:
+    # Several videos of one team at one event count once, at their best placing
+    entries = entries.assign(event_date=entries.groupby(EVENT)["event_date"].transform("min"))
+    rank = np.where(entries["placing"] == 0, 4, entries["placing"])
+    entries = entries.iloc[np.argsort(rank, kind="stable")]
+    return entries.drop_duplicates(EVENT + ["team_name"])[ENTRY_COLUMNS]
+
+
+def _play_keys(entries: pd.DataFrame) -> list:
+    """Each row's event in play order: (event_date, competition_name, comp_year)."""
+    return list(zip(entries["event_date"], entries["competition_name"], entries["comp_year"]))
+
+
+def update_elo(
+    history: Optional[pd.DataFrame],
+    df: pd.DataFrame,
+    k: float = ELO_K,
+    start: float = ELO_START,
+    names_key: str = "",
+) -> pd.DataFrame:
+    """Bring the ladder up to date with df and return the new history.
+
+    history has one row per team per event, in play order, with the rating
+    after it; pass None to start from scratch. A team's current rating is
+    its last row. df holds every result (the whole cleaned export) and is
+    authoritative: entries it adds, drops, moves to another event or
+    places differently all count as changes. The ladder is cut back to just
+    before the earliest event with a change and replayed from there, so the
+    result always matches a full replay while a new season only plays its
+    own events.
+
+    names_key identifies the name normalization (e.g. a digest of the alias
+    table). A history played under a different key is replayed in full.
+    """
+    stale = history is not None and len(history) and (
+        "names_key" not in history or (history["names_key"] != names_key).any()
+    )
+    if stale:
+        print("Team/competition names changed; replaying every event")
+        history = None
+    if history is None or history.empty:
+        history = pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    old = history[ENTRY_COLUMNS].astype({"comp_year": int, "placing": int})
+    new = _entries(df)
+
+    # Entries only one side has: added, dropped, moved, re-placed or re-dated
+    compared = new.merge(old, how="outer", on=ENTRY_COLUMNS, indicator=True)
+    changed = compared[compared["_merge"] != "both"]
+    if changed.empty:
+        return history
+    cut = min(_play_keys(changed))
+
+    # Everything before cut is unchanged, and was played first, so it's kept
+    kept = history[[key < cut for key in _play_keys(old)]]
+    ratings = kept.groupby("team_name")["rating"].last().to_dict() if len(kept) else {}
+
+    replay = new[[key >= cut for key in _play_keys(new)]]
+    replay = replay.sort_values(["event_date"] + EVENT + ["team_name"], kind="stable")
+    rows = []
+    for (date, competition, year), entrants in replay.groupby(["event_date"] + EVENT, sort=False):
+        teams = entrants["team_name"].to_numpy()
+        placing = entrants["placing"].to_numpy()
+        after = _play_event(np.array([ratings.get(team, start) for team in teams]), placing, k)
+        ratings.update(zip(teams, after))
+        rows.append(
+            pd.DataFrame(
+                {
+                    "event_date": date,
+                    "competition_name": competition,
+                    "comp_year": year,
+                    "team_name": teams,
+                    "placing": placing,
+                    "rating": after,
+                    "names_key": names_key,
+                }
+            )
+        )
+    print(f"Played {len(rows)} events ({len(history) - len(kept)} earlier entries replayed)")
+    played = [kept] if len(kept) else []
+    return pd.concat(played + rows, ignore_index=True) if played + rows else kept
+
+
+def read_elo_history(path: str) -> Optional[pd.DataFrame]:
+    """The history saved at path, or None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    text = ["event_date", "competition_name", "team_name", "names_key"]
+    history = pd.read_csv(
+        path, dtype={c: str for c in text}, keep_default_na=False, float_precision="round_trip"
+    )
+    return history.astype({"comp_year": int, "placing": int, "rating": float})
+
+
+def check_incremental(
+    df: pd.DataFrame, holdout: int = 300, before: Optional[pd.DataFrame] = None, **kwargs
+) -> None:
+    """Raise AssertionError unless an incremental update matches a full replay.
+
+    The history is first built from `before` (by default df without its
+    `holdout` most recently uploaded rows), then updated with all of df.
+    """
+    if before is None:
+        by_upload = df.iloc[np.argsort(df["published_at"].astype(str).to_numpy(), kind="stable")]
+        before = by_upload.iloc[: max(len(df) - holdout, 0)]
+    incremental = update_elo(update_elo(None, before, **kwargs), df, **kwargs)
+    full = update_elo(None, df, **kwargs)
+    pd.testing.assert_frame_equal(elo_table(incremental), elo_table(full))
+
+
+def elo_table(history: pd.DataFrame) -> pd.DataFrame:
+    """Each team's rating at the end of every season it competed in."""
+    by_year = history.groupby(["team_name", "comp_year"], sort=True)
+    table = pd.DataFrame({"events": by_year.size(), "elo": by_year["rating"].last()})
+    table.index.names = INDEX
+    return table
+
+
+if __name__ == "__main__":
+    # python rankings.py [cleaned.csv]: check incremental Elo updates against full replays
+    late = pd.DataFrame(
+        {
+            "published_at": ["2019-03-01", "2019-03-01", "2019-04-01", "2019-04-01", "2019-04-05"],
+            "competition_name": ["a", "a", "b", "b", "b"],
+            "comp_year": [2019] * 5,
+            "team_name": ["x", "y", "x", "y", "z"],
+            "placings": ["1", "None", "None", "2", "1"],
+        }
+    )
+    check_incremental(late, holdout=1)
+    # A late video with a worse placing than one already played
+    worse = late.assign(placings=["1", "None", "None", "2", "None"])
+    check_incremental(worse.iloc[[0, 1, 2, 3, 4, 3]], holdout=1)
+    # A video dropped (e.g. excluded), re-placed, and moved to another event
+    check_incremental(late.iloc[[0, 1, 3, 4]], before=late)
+    check_incremental(late.assign(placings=["1", "None", "None", "2", "3"]), before=late)
+    check_incremental(late.assign(comp_year=[2019, 2019, 2019, 2019, 2018]), before=late)
+    check_incremental(late.assign(competition_name=["a", "a", "b", "b", "a"]), before=late)
+    print("toy events: ok")
+    if len(sys.argv) > 1:
+        cleaned = pd.read_csv(sys.argv[1])
+        for holdout in (1, 50, 300):
+            check_incremental(cleaned, holdout)
+        first = cleaned.index[placing_codes(cleaned["placings"]) == 1][0]
+        check_incremental(cleaned.drop(index=first), before=cleaned)
+        moved = cleaned["comp_year"].mask(cleaned.index == first, 2011)
+        check_incremental(cleaned.assign(comp_year=moved), before=cleaned)
+        print(f"{sys.argv[1]}: ok")
@@ -0,0 +1,82 @@
+"""Team and competition scores from cleaned competition videos.
+
+A team's finalscore is its average placing weight over every competition
+it appears in, and team_score scales that by log1p(total_comps) so long
+records count for more. A competition's comp_score is the average
+finalscore of the teams that entered it, i.e. how strong its field was.
+
+Placings are turned into codes (0 = unplaced, 1-3 = first-third place) and
+weights are looked up from an array indexed by code. Everything is derived
+from one team x placing count table, so trying new weights is a small
+matrix product (see sweep_team_scores).
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Weight per placing code: unplaced, first, second, third
+PLACING_WEIGHTS = (0.10, 1.0, 0.75, 0.50)
+
+
+def placing_codes(placings: pd.Series) -> np.ndarray:
+    """Map placings ("1"/"2"/"3"/"None", or 0-3) to int codes 0-3."""
+    codes = pd.to_numeric(placings, errors="coerce").fillna(0).to_numpy()
+    return np.where((codes >= 1) & (codes <= 3), codes, 0).astype(np.int64)
+
+
+def _placing_counts(df: pd.DataFrame) -> Tuple[pd.Index, np.ndarray, np.ndarray]:
+    """Return (teams, team code per row, team x placing-code count table)."""
+    team_codes, teams = pd.factorize(df["team_name"])
+    place = placing_codes(df["placings"])
+    valid = team_codes >= 0
+    flat = np.bincount(team_codes[valid] * 4 + place[valid], minlength=len(teams) * 4)
+    return teams, team_codes, flat.reshape(len(teams), 4)
+
+
+def team_scores(df: pd.DataFrame, weights: Sequence[float] = PLACING_WEIGHTS) -> pd.DataFrame:
+    """One row per team: placing counts, total_comps and the derived scores."""
+    teams, _, counts = _placing_counts(df)
+    total = counts.sum(axis=1)
+    summed = counts @ np.asarray(weights, dtype=float)
+    final = summed / total
+    return pd.DataFrame(
+        {
+            "total_comps": total,
+            "firsts": counts[:, 1],
+            "seconds": counts[:, 2],
+            "thirds": counts[:, 3],
+            "sum_placing_score": summed,
+            "finalscore": final,
+            "team_score": final * np.log1p(total),
+        },
+        index=pd.Index(teams, name="team_name"),
+    ).sort_values("team_score", ascending=False)
+
+
+def competition_scores(df: pd.DataFrame, teams: pd.DataFrame) -> pd.DataFrame:
+    """One row per competition, from the rows and the team_scores table."""
+    comp_codes, comps = pd.factorize(df["competition_name"])
+    final = df["team_name"].map(teams["finalscore"]).to_numpy(dtype=float)
+    valid = (comp_codes >= 0) & ~np.isnan(final)
+    entries = np.bincount(comp_codes[valid], minlength=len(comps))
+    numerator = np.bincount(comp_codes[valid], weights=final[valid], minlength=len(comps))
+    return pd.DataFrame(
+        {
+            "number_of_teams_in_comp": entries,
+            "comp_numerator": numerator,
+            "comp_score": numerator / entries,
+        },
+        index=pd.Index(comps, name="competition_name"),
+    ).sort_values("comp_score", ascending=False)
+
+
+def sweep_team_scores(df: pd.DataFrame, weight_sets: Sequence[Sequence[float]]) -> pd.DataFrame:
+    """finalscore for every team (rows) under each weight set (columns)."""
+    teams, _, counts = _placing_counts(df)
+    scores = (counts @ np.asarray(weight_sets, dtype=float).T) / counts.sum(axis=1, keepdims=True)
+    return pd.DataFrame(
+        scores,
+        index=pd.Index(teams, name="team_name"),
+        columns=[tuple(w) for w in weight_sets],
+    )
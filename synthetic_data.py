@@ -0,0 +1,223 @@
+"""Synthetic crawl data for benchmarking the crawl and cleaning paths.
+
+synthetic_frame() builds rows shaped like gabroo_videos_full.csv: titles in
+the "<team> - First Place @ <competition> <year>" family, a sprinkling of
+exhibitions, mixers and misspelled team names, ISO 8601 durations,
+boilerplate descriptions and string counts. Every field is derived from a
+hash of the row number, so row i is the same whichever batch it is
+generated in. A million rows take about ten seconds.
+
+StubYouTube serves the same rows through the playlistItems/videos/channels
+calls GTVAPICALL makes, as API-shaped items, after a configurable delay per
+request. It can stand in for the real client (and client_factory) anywhere
+in GTVAPICALL.
+"""
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from GTVAPICALL import FIELDNAMES
+
+PLAYLIST_ID = "UUsynthetic"
+ID_PREFIX = "syn"
+
+_TEAM_WORDS = np.array(
+    ["nachdi", "gabroo", "jawani", "punjabi", "virsa", "rangla", "sher", "dhol",
+     "mutiyaar", "shaan", "josh", "naach", "boliyan", "chardi", "kala", "desi"]
+)
+_TEAM_SUFFIXES = np.array(["bhangra", "bhangra crew", "academy", "bhangra club", "girls", "da virsa"])
+_COMP_WORDS = np.array(
+    ["bruin", "burgh", "bulldog", "apna", "dhol di awaz", "bhangra blowout", "richmond",
+     "west coast", "bhangra arena", "boston", "lonestar", "capital", "windy city", "toronto"]
+)
+_COMP_SUFFIXES = np.array(["bhangra", "bhangra competition", "mela", "showdown", "classic"])
+_PLACES = np.array(["", "first place", "second place", "third place"])
+_BOILERPLATE = (
+    "Recorded live by GabrooTV. Subscribe for more bhangra competition videos, "
+    "and share with your team! Follow us for updates on upcoming competitions."
+)
+
+
+def _bits(indices: np.ndarray, seed: int, salt: int) -> np.ndarray:
+    """Deterministic pseudo-random uint64 per index."""
+    return pd.util.hash_array(indices.astype(np.int64) * 1_000_003 + seed * 7919 + salt)
+
+
+def _pick(choices: np.ndarray, indices: np.ndarray, seed: int, salt: int) -> np.ndarray:
+    return choices[_bits(indices, seed, salt) % np.uint64(len(choices))]
+
+
+def video_ids(indices: np.ndarray) -> np.ndarray:
+    return np.char.add(ID_PREFIX, np.char.zfill(indices.astype(str), 8))
+
+
+def synthetic_frame(n: int, start: int = 0, seed: int = 0) -> pd.DataFrame:
+    """Rows start .. start + n - 1 in FIELDNAMES layout, all columns as text."""
+    idx = np.arange(start, start + n)
+    team = pd.Series(
+        _pick(_TEAM_WORDS, idx, seed, 1).astype(object)
+        + " "
+        + _pick(_TEAM_WORDS, idx, seed, 2)
+        + " "
+        + _pick(_TEAM_SUFFIXES, idx, seed, 3)
+    )
+    # About 2% of team names lose a letter, like real typos
+    typo = _bits(idx, seed, 4) % np.uint64(50) == 0
+    team[typo] = team[typo].str.replace("a", "", n=1, regex=False)
+    comp = pd.Series(
+        _pick(_COMP_WORDS, idx, seed, 5).astype(object) + " " + _pick(_COMP_SUFFIXES, idx, seed, 6)
+    )
+    year = (2010 + _bits(idx, seed, 7) % np.uint64(15)).astype(int)
+    place = pd.Series(_pick(_PLACES, idx, seed, 8))
+    kind = _bits(idx, seed, 9) % np.uint64(100)
+
+    title = team + np.where(place != "", " - " + place, "") + " @ " + comp + " " + year.astype(str)
+    title = title.where(kind >= 3, team + " - Exhibition @ " + comp + " " + year.astype(str))
+    title = title.where(kind != 3, "Mixer @ " + comp + " " + year.astype(str))
+    title = title.str.title()
+
+    day = (_bits(idx, seed, 10) % np.uint64(365)).astype("timedelta64[D]")
+    published = (year.astype(str).astype("datetime64[D]") + day).astype(str)
+    seconds = (60 + _bits(idx, seed, 11) % np.uint64(600)).astype(int)
+    views = (_bits(idx, seed, 12) % np.uint64(100_000)).astype(int)
+
+    frame = pd.DataFrame(
+        {
+            "video_id": video_ids(idx),
+            "title": title.to_numpy(),
+            "published_at": np.char.add(published, "T18:00:00Z"),
+            "year": year.astype(str),
+            "duration": np.char.add(
+                np.char.add(np.char.add("PT", (seconds // 60).astype(str)), "M"),
+                np.char.add((seconds % 60).astype(str), "S"),
+            ),
+            "view_count": views.astype(str),
+            "like_count": (views // 40).astype(str),
+            "comment_count": (views // 400).astype(str),
+            "channel_title": "GabrooTV",
+            "category_id": "10",
+            "tags": ("bhangra;" + comp + ";" + team).to_numpy(),
+            "description": (title + "\n\n" + _BOILERPLATE).to_numpy(),
+        }
+    )
+    return frame[FIELDNAMES]
+
+
+def to_items(frame: pd.DataFrame) -> List[Dict]:
+    """videos.list items for rows in FIELDNAMES layout; to_row() inverts this."""
+    return [
+        {
+            "id": row["video_id"],
+            "snippet": {
+                "title": row["title"],
+                "publishedAt": row["published_at"],
+                "channelTitle": row["channel_title"],
+                "categoryId": row["category_id"],
+                "tags": row["tags"].split(";") if row["tags"] else [],
+                "description": row["description"],
+            },
+            "contentDetails": {"duration": row["duration"]},
+            "statistics": {
+                "viewCount": row["view_count"],
+                "likeCount": row["like_count"],
+                "commentCount": row["comment_count"],
+            },
+        }
+        for row in frame.to_dict("records")
+    ]
+
+
+def iter_frames(n: int, chunk_rows: int = 100_000, seed: int = 0) -> Iterator[pd.DataFrame]:
+    for start in range(0, n, chunk_rows):
+        yield synthetic_frame(min(chunk_rows, n - start), start, seed)
+
+
+def write_videos_csv(path: str, n: int, chunk_rows: int = 100_000, seed: int = 0) -> None:
+    """Write n synthetic rows to path a chunk at a time."""
+    for i, frame in enumerate(iter_frames(n, chunk_rows, seed)):
+        frame.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+class _Request:
+    def __init__(self, client: "StubYouTube", respond):
+        self.client = client
+        self.respond = respond
+
+    def execute(self):
+        with self.client._lock:
+            self.client.calls += 1
+        if self.client.latency:
+            time.sleep(self.client.latency)
+        return self.respond()
+
+
+class StubYouTube:
+    """Offline stand-in for the YouTube Data API client over n synthetic videos.
+
+    Every request sleeps `latency` seconds before answering. One instance
+    is safe to share between threads, so `lambda: stub` works as a
+    client_factory.
+    """
+
+    def __init__(self, n: int, latency: float = 0.0, seed: int = 0):
+        self.n = n
+        self.latency = latency
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    # Resource accessors, as on the real client
+    def playlistItems(self):
+        return self
+
+    def videos(self):
+        return self
+
+    def channels(self):
+        return _Channels(self)
+
+    def list(self, part: str, id: Optional[str] = None, playlistId: Optional[str] = None,
+             maxResults: int = 50, pageToken: Optional[str] = None):
+        if playlistId is not None:
+            return _Request(self, lambda: self._playlist_page(int(pageToken or 0), maxResults))
+        return _Request(self, lambda: self._videos(id.split(",")))
+
+    def _playlist_page(self, start: int, size: int) -> Dict:
+        stop = min(start + size, self.n)
+        items = [{"contentDetails": {"videoId": v}} for v in video_ids(np.arange(start, stop))]
+        page = {"items": items}
+        if stop < self.n:
+            page["nextPageToken"] = str(stop)
+        return page
+
+    def _videos(self, ids: List[str]) -> Dict:
+        indices = np.array([int(v[len(ID_PREFIX):]) for v in ids if v])
+        if not len(indices):
+            return {"items": []}
+        # Consecutive IDs (the usual case) are generated as one block
+        if (np.diff(indices) == 1).all():
+            frame = synthetic_frame(len(indices), int(indices[0]), self.seed)
+        else:
+            frame = pd.concat([synthetic_frame(1, int(i), self.seed) for i in indices])
+        return {"items": to_items(frame)}
+
+
+class _Channels:
+    def __init__(self, client: StubYouTube):
+        self.client = client
+
+    def list(self, part: str, id: Optional[str] = None, forHandle: Optional[str] = None, maxResults=None):
+        if forHandle is not None:
+            return _Request(self.client, lambda: {"items": [{"id": "UCsynthetic"}]})
+        return _Request(
+            self.client,
+            lambda: {
+                "items": [
+                    {"id": c, "contentDetails": {"relatedPlaylists": {"uploads": PLAYLIST_ID}}}
+                    for c in id.split(",")
+                ]
+            },
+        )
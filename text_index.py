@@ -0,0 +1,215 @@
+"""Persistent inverted index over video titles, tags and descriptions.
+
+Every field is tokenized into lowercase runs of letters and digits. Each
+token keeps a posting list of {doc: [positions]}, so keyword, prefix
+(`exhib*`) and phrase ("bhangra idols") lookups never scan the text. Queries
+combine terms with AND (the default between terms), OR, NOT and
+parentheses. A term or phrase can be limited to a field with `title:mixer`
+or `description:"world's best"`.
+
+TextIndex.add only tokenizes rows whose text it hasn't seen. When a
+re-crawled video's text changed, its old document is tombstoned. The index
+is pickled under .columnar_cache/, and index_for() brings it up to date
+with a crawl export on each run.
+"""
+import os
+import pickle
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import CACHE_DIR_NAME
+from loading import load_videos
+
+FIELDS: Tuple[str, ...] = ("title", "tags", "description")
+INDEX_PATH = os.path.join(CACHE_DIR_NAME, "text_index.pickle")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+QUERY_TOKEN_RE = re.compile(r'\(|\)|(?:\w+:)?"[^"]*"|[^\s()"]+')
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class TextIndex:
+    def __init__(self, fields: Sequence[str] = FIELDS):
+        self.fields = tuple(fields)
+        self.video_ids: List[str] = []
+        self.doc_of: Dict[str, int] = {}
+        self.text_hash: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        # field -> token -> {doc: [positions]}
+        self.postings: Dict[str, Dict[str, Dict[int, List[int]]]] = {f: {} for f in self.fields}
+        self._sorted_terms: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_of)
+
+    def add(self, df: pd.DataFrame) -> int:
+        """Index rows of df (video_id plus the text fields) that are new or changed.
+
+        Returns the number of rows tokenized.
+        """
+        text = df[list(self.fields)].astype(object).where(df[list(self.fields)].notna(), "")
+        hashes = pd.util.hash_pandas_object(text, index=False).to_numpy()
+        known = np.array([self.text_hash.get(v) for v in df["video_id"]], dtype=object)
+        todo = np.flatnonzero(known != hashes)
+        for i in todo:
+            video_id = df["video_id"].iat[i]
+            if video_id in self.doc_of:
+                self.deleted.add(self.doc_of[video_id])
+            doc = len(self.video_ids)
+            self.video_ids.append(video_id)
+            self.doc_of[video_id] = doc
+            self.text_hash[video_id] = hashes[i]
+            for field in self.fields:
+                postings = self.postings[field]
+                for position, token in enumerate(tokenize(text[field].iat[i])):
+                    postings.setdefault(token, {}).setdefault(doc, []).append(position)
+        if len(todo):
+            self._sorted_terms.clear()
+        return len(todo)
+
+    # -- lookups -------------------------------------------------------
+
+    def _fields(self, field: Optional[str]) -> Sequence[str]:
+        if field is None:
+            return self.fields
+        if field not in self.fields:
+            raise ValueError(f"Unknown field {field!r}; expected one of {self.fields}")
+        return (field,)
+
+    def term(self, token: str, field: Optional[str] = None) -> Set[int]:
+        docs: Set[int] = set()
+        for f in self._fields(field):
+            docs.update(self.postings[f].get(token, ()))
+        return docs
+
+    def prefix(self, stem: str, field: Optional[str] = None) -> Set[int]:
+        docs: Set[int] = set()
+        for f in self._fields(field):
+            terms = self._sorted_terms.get(f)
+            if terms is None:
+                terms = self._sorted_terms[f] = sorted(self.postings[f])
+            i = int(np.searchsorted(terms, stem))
+            while i < len(terms) and terms[i].startswith(stem):
+                docs.update(self.postings[f][terms[i]])
+                i += 1
+        return docs
+
+    def phrase(self, tokens: Sequence[str], field: Optional[str] = None) -> Set[int]:
+        if len(tokens) == 1:
+            return self.term(tokens[0], field)
+        docs: Set[int] = set()
+        for f in self._fields(field):
+            lists = [self.postings[f].get(token, {}) for token in tokens]
+            candidates = set(lists[0]).intersection(*lists[1:])
+            for doc in candidates:
+                starts = set(lists[0][doc])
+                for offset, postings in enumerate(lists[1:], 1):
+                    starts &= {p - offset for p in postings[doc]}
+                if starts:
+                    docs.add(doc)
+        return docs
+
+    # -- queries -------------------------------------------------------
+
+    def search_docs(self, query: str) -> Set[int]:
+        tokens = QUERY_TOKEN_RE.findall(query)
+        docs, rest = self._parse_or(tokens)
+        if rest:
+            raise ValueError(f"Unexpected {' '.join(rest)!r} in query {query!r}")
+        return docs - self.deleted
+
+    def search(self, query: str) -> Set[str]:
+        """video_ids matching query."""
+        return {self.video_ids[doc] for doc in self.search_docs(query)}
+
+    def matches(self, video_ids: pd.Series, query: str) -> pd.Series:
+        """Boolean mask of which video_ids match query."""
+        return video_ids.isin(self.search(query))
+
+    def _parse_or(self, tokens: List[str]) -> Tuple[Set[int], List[str]]:
+        docs, tokens = self._parse_and(tokens)
+        while tokens and tokens[0] == "OR":
+            more, tokens = self._parse_and(tokens[1:])
+            docs = docs | more
+        return docs, tokens
+
+    def _parse_and(self, tokens: List[str]) -> Tuple[Set[int], List[str]]:
+        docs, tokens = self._parse_not(tokens)
+        while tokens and tokens[0] not in ("OR", ")"):
+            if tokens[0] == "AND":
+                tokens = tokens[1:]
+            more, tokens = self._parse_not(tokens)
+            docs = docs & more
+        return docs, tokens
+
+    def _parse_not(self, tokens: List[str]) -> Tuple[Set[int], List[str]]:
+        if tokens and tokens[0] == "NOT":
+            docs, tokens = self._parse_not(tokens[1:])
+            return set(range(len(self.video_ids))) - docs, tokens
+        return self._parse_atom(tokens)
+
+    def _parse_atom(self, tokens: List[str]) -> Tuple[Set[int], List[str]]:
+        if not tokens or tokens[0] in OPERATORS or tokens[0] == ")":
+            raise ValueError("Query ended where a term was expected")
+        token, tokens = tokens[0], tokens[1:]
+        if token == "(":
+            docs, tokens = self._parse_or(tokens)
+            if not tokens or tokens[0] != ")":
+                raise ValueError("Unbalanced parentheses in query")
+            return docs, tokens[1:]
+
+        field = None
+        if ":" in token.split('"', 1)[0]:
+            field, token = token.split(":", 1)
+        if token.startswith('"'):
+            return self.phrase(tokenize(token.strip('"')), field), tokens
+        if token.endswith("*"):
+            return self.prefix(token[:-1].lower(), field), tokens
+        words = tokenize(token)
+        return (self.phrase(words, field) if words else set()), tokens
+
+
+def load_index(path: str = INDEX_PATH) -> TextIndex:
+    if not os.path.exists(path):
+        return TextIndex()
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_index(index: TextIndex, path: str = INDEX_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+_open_indexes: Dict[Tuple[str, str], Tuple[Tuple[float, int], TextIndex]] = {}
+
+
+def index_for(csv_path: str, path: str = INDEX_PATH) -> TextIndex:
+    """The index at path, updated with any new or changed rows of csv_path.
+
+    Kept in memory per process until the export changes, so several
+    filters in one run share a single load.
+    """
+    stamp = os.stat(csv_path)
+    version = (stamp.st_mtime, stamp.st_size)
+    key = (os.path.abspath(csv_path), os.path.abspath(path))
+    cached = _open_indexes.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    index = cached[1] if cached else load_index(path)
+    added = index.add(load_videos(csv_path, columns=["video_id", *index.fields]))
+    if added:
+        print(f"Indexed {added} videos")
+        save_index(index, path)
+    _open_indexes[key] = (version, index)
+    return index
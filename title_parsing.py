@@ -0,0 +1,50 @@
+"""Split lowercased video titles into team, competition, year and placing.
+
+Titles look like "<team> at <competition> <year>", with " @ " or "-" as
+alternative delimiters, and sometimes "first/second/third place". One
+compiled pattern built from anchored lookaheads captures every field, so
+parse_titles is a single str.extract over the column.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+TITLE_PATTERN = re.compile(
+    # team: everything before whichever delimiter comes first
+    r"^(?:(?=(?P<team_name>.*?)(?: at | @ |-)))?"
+    # competition: split on " at " if present, else "@" (when " @ " is
+    # present), else "-"
+    r"(?:(?=.*? at (?P<comp_at>.*))|(?=.* @ )(?=[^@]*@(?P<comp_sym>.*))|(?=[^-]*-(?P<comp_dash>.*)))?"
+    r"(?:(?=.*?\b(?P<comp_year>\d{4})\b))?"
+    r"(?:(?=.*?(?P<first>first place)))?"
+    r"(?:(?=.*?(?P<second>second place)))?"
+    r"(?:(?=.*?(?P<third>third place)))?",
+    re.DOTALL,
+)
+
+
+def parse_titles(titles: pd.Series) -> pd.DataFrame:
+    """Parse titles into a frame with the same index and columns:
+
+    team_name, competition_name  str, or None when the title has no delimiter
+    comp_year                    Int16, first 4-digit number in the title
+    placings                     "1", "2", "3" or "None"
+    """
+    parts = titles.str.extract(TITLE_PATTERN)
+    competition = parts["comp_at"].fillna(parts["comp_sym"]).fillna(parts["comp_dash"])
+    competition = competition.str.replace(r"\b\d{4}\b", "", regex=True).str.strip()
+    placings = np.select(
+        [parts["first"].notna(), parts["second"].notna(), parts["third"].notna()],
+        ["1", "2", "3"],
+        default="None",
+    )
+    return pd.DataFrame(
+        {
+            "team_name": parts["team_name"].str.strip(),
+            "competition_name": competition,
+            "comp_year": pd.to_numeric(parts["comp_year"]).astype("Int16"),
+            "placings": placings,
+        },
+        index=titles.index,
+    )
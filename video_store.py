@@ -0,0 +1,64 @@
+"""Local SQLite store of crawled videos, keyed by video_id.
+
+Used by GTVAPICALL's incremental sync so a daily refresh only fetches videos
+it has not seen before (plus any whose stored details are older than a
+chosen age) instead of re-crawling the whole channel.
+"""
+import csv
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+
+def open_store(path: str, fieldnames: List[str]) -> sqlite3.Connection:
+    """Open (creating if needed) the store with one TEXT column per field."""
+    conn = sqlite3.connect(path)
+    columns = ", ".join(f'"{name}" TEXT' for name in fieldnames if name != "video_id")
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS videos ("video_id" TEXT PRIMARY KEY, {columns}, "fetched_at" REAL)'
+    )
+    conn.commit()
+    return conn
+
+
+def known_video_ids(conn: sqlite3.Connection) -> Set[str]:
+    return {row[0] for row in conn.execute('SELECT "video_id" FROM videos')}
+
+
+def stale_video_ids(conn: sqlite3.Connection, max_age_days: float) -> List[str]:
+    """Return IDs whose details were fetched more than max_age_days ago."""
+    cutoff = time.time() - max_age_days * 86400
+    rows = conn.execute('SELECT "video_id" FROM videos WHERE "fetched_at" < ?', (cutoff,))
+    return [row[0] for row in rows]
+
+
+def upsert_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[Dict],
+    fieldnames: List[str],
+    fetched_at: Optional[float] = None,
+) -> int:
+    """Insert or replace rows, stamping them with fetched_at (default now)."""
+    stamp = time.time() if fetched_at is None else fetched_at
+    columns = ", ".join(f'"{name}"' for name in fieldnames)
+    placeholders = ", ".join("?" for _ in fieldnames)
+    sql = f'INSERT OR REPLACE INTO videos ({columns}, "fetched_at") VALUES ({placeholders}, ?)'
+    values = [[str(r.get(name, "")) for name in fieldnames] + [stamp] for r in rows]
+    conn.executemany(sql, values)
+    conn.commit()
+    return len(values)
+
+
+def export_csv(conn: sqlite3.Connection, path: str, fieldnames: List[str]) -> int:
+    """Write every stored video to path, newest upload first like the playlist."""
+    columns = ", ".join(f'"{name}"' for name in fieldnames)
+    rows = conn.execute(f'SELECT {columns} FROM videos ORDER BY "published_at" DESC')
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    print(f"Wrote {count} rows to {path}")
+    return count